@@ -27,12 +27,18 @@ try:
     # Set the page config at the very beginning of the script
     st.set_page_config(page_title="Real or Dubious News",
                        layout="wide")
+    import pandas as pd
+    # The shared datasets (sl_data_for_dashboard/dataset_store.py) are
+    # handed to every session as shallow views; with copy-on-write a
+    # session's writes copy the touched columns instead of reaching the
+    # shared frame. Set here, once, because it changes pandas semantics
+    # for the whole process.
+    pd.set_option("mode.copy_on_write", True)
     import setup
     import ROD_menu
     from sl_utils.logger import streamlit_logger as logger
-    from sl_data_for_dashboard.data_load import (dashboarddata,
-                                                 mapdata,
-                                                 )
+    from sl_data_for_dashboard.dataset_store import get_dataset
+    from sl_components.cube import get_cube
 except ImportError as e:
     raise SystemExit(f"Error: Failed to import modules - {e}")
 
@@ -60,17 +66,11 @@ logger.info("Setup completed successfully.")
 # Run the first load function
 try:
     with st.spinner('Please wait while the data sets are being calculated...'):
-        @st.cache_data
-        def load_mapdata():
-            return mapdata()
-
-        @st.cache_data
-        def load_dashboard_data():
-            return dashboarddata()
-
-        # Store data in session state
-        st.session_state['data_for_map'] = load_mapdata()
-        st.session_state['data_clean'] = load_dashboard_data()
+        # Store read-only views of the shared datasets in session state
+        st.session_state['data_for_map'] = get_dataset('data_for_map')
+        st.session_state['data_clean'] = get_dataset('data_clean')
+        # Pre-aggregate the article-count cube used by the count charts
+        get_cube()
 
 except Exception as e:
     logger.critical(f"First load crashed: {e}", exc_info=True)
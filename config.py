@@ -85,6 +85,137 @@ FILTER_DEF = {  # "filter_name": {"column_name": "value"}
         "date": "> 2001-01-01"
     }, }
 
+# Dataset schemas applied by sl_data_for_dashboard.data_load
+# renames -> derived columns -> categoricals/dtypes -> temporal index.
+# Columns missing from a source are skipped.
+DATA_SCHEMAS = {  # "dataset_name": {"schema_part": definition}
+    "dashboard": {
+        "renames": {
+            "title_polarity_value": "title_polarity",
+            "article_polarity_value": "article_polarity",
+            "title_subjectivity_value": "title_subjectivity",
+            "article_subjectivity_value": "article_subjectivity",
+            "overall_polarity_value": "overall_polarity",
+            "overall_subjectivity_value": "overall_subjectivity",
+            "contradiction_polarity_value": "contradiction_polarity",
+            "contradiction_subjectivity_value": "contradiction_subjectivity",
+            "polarity_variations_value": "polarity_variations",
+            "subjectivity_variations_value": "subjectivity_variations",
+            "count_of_locations": "unique_location_count",
+            "text_length_value": "text_length",
+            "article_id": "article_count",
+        },
+        # built by data_load.DERIVED_COLUMNS
+        "derived": ["month_num", "date_clean"],
+        "categoricals": ["source_name", "subject", "day_label",
+                         "media_type", "month"],
+        # every column starting with one of these is categorical too
+        "categorical_prefixes": ["sentiment_"],
+        "dtypes": {
+            "title_polarity": "float32",
+            "article_polarity": "float32",
+            "title_subjectivity": "float32",
+            "article_subjectivity": "float32",
+            "overall_polarity": "float32",
+            "overall_subjectivity": "float32",
+            "contradiction_polarity": "float32",
+            "contradiction_subjectivity": "float32",
+            "polarity_variations": "float32",
+            "subjectivity_variations": "float32",
+            "label": "int8",
+            "month_num": "int8",
+            "year": "int16",
+        },
+        "datetimes": [],
+        # rows sorted by this column, which also becomes the index
+        "temporal_index": "date_clean",
+    },
+    "map": {
+        "renames": {},
+        "derived": [],
+        "categoricals": ["state", "country", "continent", "subcontinent"],
+        "categorical_prefixes": [],
+        "dtypes": {
+            "year": "int16",
+            "month": "int8",
+            "day": "int8",
+            "fake_count": "int32",
+            "real_count": "int32",
+        },
+        "datetimes": ["date"],
+        "temporal_index": None,
+    },
+}
+
+DATA_CACHE = {  # "cache_setting": "value"
+    "enabled": True,
+    # written next to the source, e.g. dashboard_data.zip.parquet
+    "suffix": ".parquet",
+    # parquet metadata key holding the source mtime/size signature
+    "signature_key": "rod_source_signature",
+}
+
+FIGURE_CACHE = {  # "cache_setting": "value"
+    # rendered images kept per process, least recently used dropped first
+    "max_bytes": 64 * 1024 * 1024,
+    "format": "png",  # or "svg"
+    "dpi": 200,
+}
+
+PAGE_RENDERING = {  # "render_setting": "value"
+    # Only run the elements of the selected tab; other tabs run when
+    # they are selected. A page can override this with "lazy_tabs" in
+    # its page_settings block of page_settings.json.
+    "lazy_tabs": True,
+    # Run each visualization as an st.fragment, so its own widgets only
+    # rerun that visualization instead of the whole app script
+    "fragments": True,
+}
+
+GEOCODING = {  # "geocoding_setting": "value"
+    # SQLite cache of geocoding results, see sl_utils/geocoding.py
+    "cache_path": os.path.join("data", "geocode_cache.sqlite"),
+    "ttl_days": 180,
+    # "not found" answers are retried sooner
+    "negative_ttl_days": 30,
+    "requests_per_second": 5.0,
+    "burst": 5,
+    "max_workers": 4,
+    "max_retries": 3,
+    "backoff_seconds": 1.0,
+}
+
+NLP_EXTRACTION = {  # "extraction_setting": "value"
+    # see sl_utils/location_extraction.py
+    "model": "en_core_web_sm",
+    "batch_size": 256,  # texts per nlp.pipe batch
+    "n_process": max(1, (os.cpu_count() or 2) - 1),
+    "chunk_size": 2000,  # articles read and yielded per chunk
+}
+
+LOCATION_MATCHER = {  # "matcher_setting": "value"
+    # known locations for keyword matching, see sl_utils/location_matcher.py
+    "source": os.path.join("sl_data_for_dashboard", "unique_locations.zip"),
+    "location_column": "location",
+    # rows with 1 in this column are left out of the matcher
+    "ignore_column": "ignore",
+}
+
+TEXT_CLEANING = {  # "cleaning_setting": "value"
+    # see sl_utils/text_cleaning.py
+    "n_process": max(1, (os.cpu_count() or 2) - 1),
+    "chunk_size": 5000,  # texts per worker task
+}
+
+SENTIMENT = {  # "sentiment_setting": "value"
+    # see sl_utils/sentiment.py
+    "cache_path": os.path.join("data", "sentiment_cache.sqlite"),
+    # "textblob", or "lexicon" for the faster array-based scorer
+    "scorer": "textblob",
+    "n_process": max(1, (os.cpu_count() or 2) - 1),
+    "chunk_size": 2000,  # texts per worker task
+}
+
 SECURITY = {  # "security_variable": "security_value"
     "is_admin": False,
     "is_authenticated": False,
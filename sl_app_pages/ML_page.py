@@ -5,6 +5,7 @@ import pandas as pd
 import joblib
 import json
 import os
+from sl_utils.figure_cache import figure_key, show_figure
 
 # -------- CONFIG --------
 MODEL_TYPE = "classification"  # or "classification"
@@ -41,6 +42,18 @@ def load_explanation():
     return "Explanation not available."
 
 
+def draw_confusion_matrix(matrix):
+    fig, ax = plt.subplots()
+    sns.heatmap(matrix,
+                annot=True,
+                fmt="d",
+                cmap="Blues",
+                xticklabels=["Predicted Fake", "Predicted Real"],
+                yticklabels=["Actual Fake", "Actual Real"],
+                ax=ax)
+    return fig
+
+
 # -------- Main Entry Point --------
 def run():
     st.subheader("📰 Fake News Detection Model Dashboard")
@@ -72,15 +85,9 @@ def run():
                     [conf_df["False Negatives"][0], conf_df["True Positives"][0]]
                 ]
 
-                fig, ax = plt.subplots()
-                sns.heatmap(matrix,
-                            annot=True,
-                            fmt="d",
-                            cmap="Blues",
-                            xticklabels=["Predicted Fake", "Predicted Real"],
-                            yticklabels=["Actual Fake", "Actual Real"],
-                            ax=ax)
-                st.pyplot(fig)
+                key = figure_key("confusion_matrix",
+                                 [[int(v) for v in row] for row in matrix])
+                show_figure(key, lambda: draw_confusion_matrix(matrix))
 
         # provide guidance on meanings of Classification Report metrics
         st.write("### Classification Report Metrics")
@@ -1,12 +1,192 @@
 
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from sl_components.map_aggregation import (aggregate_map_counts,
+                                           get_monthly_frames,
+                                           get_prefix_index,
+                                           )
+from sl_components.geo_hierarchy import get_geo_hierarchy
 from sl_utils.logger import streamlit_logger
 from sl_utils.logger import log_function_call
 
+# value each display mode colours by, for a shared time-lapse colour range
+TIME_LAPSE_Z = {"Fake Articles": "fake_count",
+                "Real Articles": "real_count",
+                "All Articles": "merged_scale",
+                "% Fake of Total": "fake_percentage"}
 
+
+def add_map_shares(data):
+    """Add total_articles, fake_percentage and merged_scale columns."""
+    # **Calculate Percentage of Fake Articles**
+    data["total_articles"] = data["fake_count"] + data["real_count"]
+    data["fake_percentage"] = ((
+        data["fake_count"] /
+        data["total_articles"]) * 100
+    ).fillna(0)  # Fill NaN with 0 if division fails
+
+    # Generate a blended color value:
+    # - Red = Fake-heavy
+    # - Blue = Real-heavy
+    # - Purple = Balanced mix
+    total = data["total_articles"]
+    data["merged_scale"] = data["fake_count"].div(total).fillna(0.5)
+    return data
+
+
+def map_trace(data, location_column, location_mode, display_mode):
+    """Choropleth trace of data (see add_map_shares) for display_mode."""
+    if display_mode == "Fake Articles":
+        # **Fake News Choropleth**
+        trace = go.Choropleth(
+            locations=data[location_column],
+            z=data["fake_count"],
+            locationmode=location_mode,
+            colorscale='Reds',
+            colorbar=dict(title="Fake Articles",
+                          x=1.02,
+                          len=0.65,
+                          y=0.5,
+                          thickness=15),
+            text=[f"Fake: {f} | Real: {r}" for f, r in zip(data["fake_count"], data["real_count"])],
+            hovertemplate=(
+                '<b>%{location}</b><br>'
+                'Fake Articles: %{z}<br>'
+                'Real Articles: %{text[1]}<br>'
+            ),
+            name="Fake Articles"
+        )
+    elif display_mode == "Real Articles":
+        # **Real News Choropleth**
+        trace = go.Choropleth(
+            locations=data[location_column],
+            z=data["real_count"],
+            locationmode=location_mode,
+            colorscale='Blues',
+            colorbar=dict(title="Real Articles",
+                          x=1.02,
+                          len=0.65,
+                          y=0.5,
+                          thickness=15),
+            text=[f"Fake: {f} | Real: {r}" for f, r in zip(data["fake_count"], data["real_count"])],
+            hovertemplate=(
+                '<b>%{location}</b><br>'
+                'Fake Articles: %{text[0]}<br>'
+                'Real Articles: %{z}<br>'
+            ),
+            name="Real Articles"
+        )
+    elif display_mode == "All Articles":
+        trace = go.Choropleth(
+            locations=data[location_column],
+            z=data["merged_scale"],
+            locationmode=location_mode,
+            # Blue (Real) → Purple (Mix) → Red (Fake)
+            colorscale=[(0, "blue"), (0.5, "purple"), (1, "red")],
+            colorbar=dict(title="Fake-Real Mix",
+                          x=1.02,
+                          len=0.65,
+                          y=0.5,
+                          thickness=15),
+            text=data[['fake_count',
+                       'real_count',
+                       'fake_percentage']],
+            hovertemplate=(
+                '<b>%{location}</b><br>'
+                'Fake Articles: %{text[0]}<br>'
+                'Real Articles: %{text[1]}<br>'
+                '% Fake Articles: %{text[2]:.2f}%<br>'
+            ),
+            name="Fake-Real Mix"
+        )
+
+    else:  # **Percentage of Fake Articles**
+        trace = go.Choropleth(
+            locations=data[location_column],
+            z=data["fake_percentage"],
+            locationmode=location_mode,
+            colorscale='OrRd',  # Orange-Red for percentage
+            # Center legend
+            colorbar=dict(title="% Fake Articles",
+                          x=1.02,
+                          len=0.65,
+                          y=0.5,
+                          thickness=15
+                          ),
+            text=data[['fake_percentage']],
+            hovertemplate=(
+                '<b>%{location}</b><br>'
+                '% Fake Articles: %{z:.2f}%<br>'
+            ),
+            name="% Fake Articles"
+        )
+
+    return trace
+
+
+def time_lapse_figure(frames, location_mode, display_mode, start, end):
+    """
+    Animated choropleth with one frame per month between start and end,
+    drawn from the dense arrays of map_aggregation.get_monthly_frames.
+    """
+    months = frames["months"]
+    shown = np.flatnonzero(
+        (months >= np.datetime64(start, "M")) &
+        (months <= np.datetime64(end, "M")))
+    data_by_month = [
+        add_map_shares(pd.DataFrame({
+            "location": frames["locations"],
+            "fake_count": frames["fake_count"][i],
+            "real_count": frames["real_count"][i],
+        })) for i in shown]
+    labels = [str(month) for month in months[shown]]
+
+    # one colour range for all frames so months can be compared
+    z_column = TIME_LAPSE_Z[display_mode]
+    z_max = max([data[z_column].max() for data in data_by_month] + [1])
+    traces = []
+    for data in data_by_month:
+        trace = map_trace(data, "location", location_mode, display_mode)
+        if display_mode != "All Articles":
+            trace.update(zmin=0, zmax=z_max)
+        traces.append(trace)
+
+    fig = go.Figure(
+        data=traces[:1],
+        frames=[go.Frame(data=[trace], name=label)
+                for trace, label in zip(traces, labels)])
+    fig.update_layout(
+        updatemenus=[dict(
+            type="buttons",
+            showactive=False,
+            x=0.05, y=0.05,
+            buttons=[
+                dict(label="Play", method="animate",
+                     args=[None, dict(frame=dict(duration=700, redraw=True),
+                                      transition=dict(duration=0),
+                                      fromcurrent=True)]),
+                dict(label="Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False),
+                                        mode="immediate")]),
+            ])],
+        sliders=[dict(
+            active=0,
+            currentvalue=dict(prefix="Month: "),
+            steps=[dict(label=label, method="animate",
+                        args=[[label], dict(mode="immediate",
+                                            frame=dict(duration=0,
+                                                       redraw=True))])
+                   for label in labels])])
+    return fig
+
+
+# A fragment: moving the slider or changing the level or display mode
+# reruns only the map, not the whole app script
 @log_function_call(streamlit_logger)
+@st.fragment
 def display_maps():
-    import pandas as pd
-    import streamlit as st
 
     # Load dataset
     with st.spinner('Loading data...'):
@@ -16,14 +196,10 @@ def display_maps():
             st.error("Failed to load data. Check ETL process.")
             streamlit_logger.error("Failed to load data. Check ETL process.")
             return
-    # **Convert date column to datetime.date for
-    # Streamlit slider compatibility**
-    # Ensure the "date" column is in datetime format
-    articles["date"] = pd.to_datetime(articles["date"], errors='coerce')
-    articles["date"] = articles["date"].dt.date
-
-    # Get min/max dates
-    min_date, max_date = articles["date"].min(), articles["date"].max()
+    # Get min/max dates from the prefix index (sorted days), as
+    # datetime.date for Streamlit slider compatibility
+    days = get_prefix_index()["days"]
+    min_date, max_date = days[0].item(), days[-1].item()
     # Wrap layout in a container div with custom CSS
     Title = st.container()
     st.markdown("### Version: v0.9")
@@ -64,11 +240,6 @@ def display_maps():
             index=2  # Default to Country
         )
 
-        # **Filter Data Based on Selected Date Range**
-        filtered_data = (
-            articles[(articles["date"] >= start_date) &
-                     (articles["date"] <= end_date)])
-
         if geo_level == "Continent":
             group_col = "continent"
             location_mode = "country names"
@@ -87,38 +258,26 @@ def display_maps():
             location_mode = "USA-states"
             map_countries = False
 
-        @st.cache_data
-        def get_aggregated_data(df, start, end, group_col):
-            filtered = df[(df["date"] >= start) & (df["date"] <= end)]
-            grouped = filtered.groupby(group_col)[["fake_count", "real_count"]].sum().reset_index()
-            return grouped
+        # **Optional Drill-Down into one Continent**
+        within = None
+        if group_col != "continent":
+            continents = list(get_geo_hierarchy()["name_index"]["continent"])
+            continent = st.selectbox("Limit to Continent:",
+                                     ["All"] + continents, index=0)
+            if continent != "All":
+                within = ("continent", continent)
 
         # **Aggregate Data by Country (Summing Fake and Real Articles)**
-        aggregated_data = get_aggregated_data(articles, start_date, end_date, group_col)
-
-        if map_countries:
-            country_mapping = (
-                articles[["country", group_col]].drop_duplicates())
-            aggregated_data = aggregated_data.merge(
-                country_mapping, on=group_col, how="left")
+        # difference of two cumulative rows rolled up the geo hierarchy,
+        # see map_aggregation; continent and subcontinent totals come
+        # back once per country so the map can colour countries
+        aggregated_data = aggregate_map_counts(start_date, end_date,
+                                               group_col, within=within,
+                                               by_country=map_countries)
 
         st.write(f"{len(aggregated_data)} rows after filtering")
 
-        # **Calculate Percentage of Fake Articles**
-        aggregated_data["total_articles"] = (
-            aggregated_data["fake_count"] + aggregated_data["real_count"]
-        )
-        aggregated_data["fake_percentage"] = ((
-            aggregated_data["fake_count"] /
-            aggregated_data["total_articles"]) * 100
-        ).fillna(0)  # Fill NaN with 0 if division fails
-
-        # Generate a blended color value:
-        # - Red = Fake-heavy
-        # - Blue = Real-heavy
-        # - Purple = Balanced mix
-        total = aggregated_data["total_articles"]
-        aggregated_data["merged_scale"] = aggregated_data["fake_count"].div(total).fillna(0.5)
+        add_map_shares(aggregated_data)
 
         # **Option to Switch Between Absolute Count, Percentage, and Merged**
         display_mode = st.radio(
@@ -129,99 +288,25 @@ def display_maps():
                      "% Fake of Total"],
             index=0
         )
+
+        # **Time-Lapse: animate the selected range month by month**
+        play = st.toggle("Play month by month", value=False)
         st.markdown("</div>", unsafe_allow_html=True)
     with col2:
-        import plotly.graph_objects as go
         st.markdown("<div class='column-style'>", unsafe_allow_html=True)
         # **Create Choropleth Map**
-        fig = go.Figure()
-
         location_column = "country" if map_countries else group_col
 
-        if display_mode == "Fake Articles":
-            # **Fake News Choropleth**
-            fig.add_trace(go.Choropleth(
-                locations=aggregated_data[location_column],
-                z=aggregated_data["fake_count"],
-                locationmode=location_mode,
-                colorscale='Reds',
-                colorbar=dict(title="Fake Articles",
-                              x=1.02,
-                              len=0.65,
-                              y=0.5,
-                              thickness=15),
-                text=[f"Fake: {f} | Real: {r}" for f, r in zip(aggregated_data["fake_count"], aggregated_data["real_count"])],
-                hovertemplate=(
-                    '<b>%{location}</b><br>'
-                    'Fake Articles: %{z}<br>'
-                    'Real Articles: %{text[1]}<br>'
-                ),
-                name="Fake Articles"
-            ))
-        elif display_mode == "Real Articles":
-            # **Real News Choropleth**
-            fig.add_trace(go.Choropleth(
-                locations=aggregated_data[location_column],
-                z=aggregated_data["real_count"],
-                locationmode=location_mode,
-                colorscale='Blues',
-                colorbar=dict(title="Real Articles",
-                              x=1.02,
-                              len=0.65,
-                              y=0.5,
-                              thickness=15),
-                text=[f"Fake: {f} | Real: {r}" for f, r in zip(aggregated_data["fake_count"], aggregated_data["real_count"])],
-                hovertemplate=(
-                    '<b>%{location}</b><br>'
-                    'Fake Articles: %{text[0]}<br>'
-                    'Real Articles: %{z}<br>'
-                ),
-                name="Real Articles"
-            ))
-        elif display_mode == "All Articles":
-            fig.add_trace(go.Choropleth(
-                locations=aggregated_data[location_column],
-                z=aggregated_data["merged_scale"],
-                locationmode=location_mode,
-                # Blue (Real) → Purple (Mix) → Red (Fake)
-                colorscale=[(0, "blue"), (0.5, "purple"), (1, "red")],
-                colorbar=dict(title="Fake-Real Mix",
-                              x=1.02,
-                              len=0.65,
-                              y=0.5,
-                              thickness=15),
-                text=aggregated_data[['fake_count',
-                                      'real_count',
-                                      'fake_percentage']],
-                hovertemplate=(
-                    '<b>%{location}</b><br>'
-                    'Fake Articles: %{text[0]}<br>'
-                    'Real Articles: %{text[1]}<br>'
-                    '% Fake Articles: %{text[2]:.2f}%<br>'
-                ),
-                name="Fake-Real Mix"
-            ))
-
-        else:  # **Percentage of Fake Articles**
-            fig.add_trace(go.Choropleth(
-                locations=aggregated_data[location_column],
-                z=aggregated_data["fake_percentage"],
-                locationmode=location_mode,
-                colorscale='OrRd',  # Orange-Red for percentage
-                # Center legend
-                colorbar=dict(title="% Fake Articles",
-                              x=1.02,
-                              len=0.65,
-                              y=0.5,
-                              thickness=15
-                              ),
-                text=aggregated_data[['fake_percentage']],
-                hovertemplate=(
-                    '<b>%{location}</b><br>'
-                    '% Fake Articles: %{z:.2f}%<br>'
-                ),
-                name="% Fake Articles"
-            ))
+        if play:
+            # frames are precomputed per level, see map_aggregation
+            frames = get_monthly_frames(group_col, within=within,
+                                        by_country=map_countries)
+            fig = time_lapse_figure(frames, location_mode, display_mode,
+                                    start_date, end_date)
+        else:
+            fig = go.Figure()
+            fig.add_trace(map_trace(aggregated_data, location_column,
+                                    location_mode, display_mode))
 
         # **Update Layout**
         fig.update_layout(
@@ -1,14 +1,47 @@
 import streamlit as st
 import importlib
+from config import PAGE_RENDERING
 from sl_app_pages.page_configs import load_page_settings, execute_element_call
 from sl_utils.logger import log_function_call, streamlit_logger as logger
 
+TAB_DEFAULT_NAMES = {"tab1": "Tab 1", "tab2": "Tab 2", "tab3": "Tab 3"}
+
+# Element slots of each tab, in display order. A tuple is a row of
+# columns, each column a list of slots.
+TWO_COLUMN_LAYOUT = ["Header", "Upper",
+                     (["column1header", "Upper_left", "Lower_left"],
+                      ["column2header", "Upper_right", "Lower_right"])]
+TAB_LAYOUTS = {
+    "tab1": TWO_COLUMN_LAYOUT,
+    "tab2": TWO_COLUMN_LAYOUT,
+    "tab3": ["Header", "Upper", "Visualizations"],
+}
+
+
+def render_tab(tab_settings, layout, imported_objects):
+    """
+    Run the elements of one tab in the slots given by layout
+    (see TAB_LAYOUTS).
+    """
+    for slot in layout:
+        if isinstance(slot, tuple):
+            for column, column_slots in zip(st.columns(len(slot)), slot):
+                with column:
+                    render_tab(tab_settings, column_slots, imported_objects)
+        else:
+            with st.container():
+                execute_element_call(tab_settings.get(slot, {}),
+                                     imported_objects)
+
 
 @log_function_call(logger)
 def display_page(functionname):
     """
     Template function to generate a Streamlit page
     with Debug Mode and Containers.
+
+    With lazy tabs (PAGE_RENDERING["lazy_tabs"]) only the selected tab's
+    elements run on each rerun.
     """
 
     # Add Debug Mode Toggle in Sidebar
@@ -52,51 +85,27 @@ def display_page(functionname):
             if st.session_state.debug_mode:
                 st.error(f"❌ Failed to import `{import_path}`: {e}")
 
-    # Create Streamlit Tabs
-    tab1, tab2, tab3 = st.tabs([
-        tab_contents.get("tab1", {}).get("Header", {}).get("content", "Tab 1"),
-        tab_contents.get("tab2", {}).get("Header", {}).get("content", "Tab 2"),
-        tab_contents.get("tab3", {}).get("Header", {}).get("content", "Tab 3")
-    ])
+    tab_names = {tab: tab_contents.get(tab, {}).get("Header",
+                                                    {}).get("content", default)
+                 for tab, default in TAB_DEFAULT_NAMES.items()}
+    page_options = page_settings.get("page_settings", {})
+    lazy_tabs = page_options.get("lazy_tabs", PAGE_RENDERING["lazy_tabs"])
+
+    if lazy_tabs:
+        # A tab selector instead of st.tabs: st.tabs only hides inactive
+        # tabs in the browser, so every element of every tab would run
+        active_tab = st.radio("Section", list(tab_names), horizontal=True,
+                              format_func=tab_names.get,
+                              key=f"{functionname}_active_tab",
+                              label_visibility="collapsed")
+        tab_areas = {active_tab: st.container()}
+    else:
+        tab_areas = dict(zip(tab_names, st.tabs(list(tab_names.values()))))
 
     # Define Global Containers
     Header = st.container()
     Upper = st.container()
 
-    # Process Tab 1
-    with tab1:
-        Tab1Header = st.container()
-        Tab1Upper = st.container()
-        col1, col2 = st.columns(2)
-        with col1:
-            tab1column1header = st.container()
-            tab1Upper_left = st.container()
-            tab1Lower_left = st.container()
-        with col2:
-            tab1column2header = st.container()
-            tab1Upper_right = st.container()
-            tab1Lower_right = st.container()
-
-    # Process Tab 2
-    with tab2:
-        tab2Header = st.container()
-        tab2Upper = st.container()
-        col1, col2 = st.columns(2)
-        with col1:
-            tab2column1header = st.container()
-            tab2Upper_left = st.container()
-            tab2Lower_left = st.container()
-        with col2:
-            tab2column2header = st.container()
-            tab2Upper_right = st.container()
-            tab2Lower_right = st.container()
-
-    # Process Tab 3
-    with tab3:
-        tab3Header = st.container()
-        tab3Upper = st.container()
-        Visualizations = st.container()
-
     # Execute Element Calls
     # Global Containers
     with Header:
@@ -104,86 +113,10 @@ def display_page(functionname):
     with Upper:
         execute_element_call(page_settings.get("Upper", {}), imported_objects)
 
-    # Tab 1
-    with Tab1Header:
-        execute_element_call(tab_contents.get("tab1", {}).get("Header", {}),
-                             imported_objects)
-    with Tab1Upper:
-        execute_element_call(tab_contents.get("tab1", {}).get("Upper", {}),
-                             imported_objects)
-    with tab1column1header:
-        execute_element_call(tab_contents.get("tab1",
-                                              {}).get("column1header", {}),
-                             imported_objects)
-    with tab1Upper_left:
-        execute_element_call(tab_contents.get("tab1",
-                                              {}).get("Upper_left", {}),
-                             imported_objects)
-    with tab1Lower_left:
-        execute_element_call(tab_contents.get("tab1",
-                                              {}).get("Lower_left", {}),
-                             imported_objects)
-    with tab1column2header:
-        execute_element_call(tab_contents.get("tab1",
-                                              {}).get("column2header", {}),
-                             imported_objects)
-    with tab1Upper_right:
-        execute_element_call(tab_contents.get("tab1",
-                                              {}).get("Upper_right", {}),
-                             imported_objects)
-    with tab1Lower_right:
-        execute_element_call(tab_contents.get("tab1",
-                                              {}).get("Lower_right", {}),
-                             imported_objects)
-
-    # Tab 2
-    with tab2Header:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("Header", {}),
-                             imported_objects)
-    with tab2Upper:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("Upper", {}),
-                             imported_objects)
-    with tab2column1header:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("column1header", {}),
-                             imported_objects)
-    with tab2Upper_left:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("Upper_left", {}),
-                             imported_objects)
-    with tab2Lower_left:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("Lower_left", {}),
-                             imported_objects)
-    with tab2column2header:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("column2header", {}),
-                             imported_objects)
-    with tab2Upper_right:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("Upper_right", {}),
-                             imported_objects)
-    with tab2Lower_right:
-        execute_element_call(tab_contents.get("tab2",
-                                              {}).get("Lower_right", {}),
-                             imported_objects)
-
-    # Tab 3
-    with tab3Header:
-        execute_element_call(tab_contents.get("tab3",
-                                              {}).get("Header", {}),
-                             imported_objects)
-    with tab3Upper:
-        execute_element_call(tab_contents.get("tab3",
-                                              {}).get("Upper", {}),
-                             imported_objects)
-    with Visualizations:
-        execute_element_call(tab_contents.get("tab3",
-                                              {}).get("Visualizations",
-                                                      {}),
-                             imported_objects)
+    for tab, area in tab_areas.items():
+        with area:
+            render_tab(tab_contents.get(tab, {}), TAB_LAYOUTS[tab],
+                       imported_objects)
 
     # Show Debug Logs if Debug Mode is Active
     if st.session_state.debug_mode:
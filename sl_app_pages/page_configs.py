@@ -6,6 +6,37 @@ import json
 import streamlit as st
 from sl_utils.logger import log_function_call, streamlit_logger as logger
 import importlib
+from config import PAGE_RENDERING
+
+
+@st.fragment
+def _visualization_fragment(function_to_call, content):
+    # Widget changes inside a fragment rerun only this function, so the
+    # errors of those reruns have to be handled here as well. A failing
+    # chart is always reported in its place rather than left blank
+    # (st.rerun and st.stop are not Exceptions and pass through).
+    try:
+        function_to_call()
+    except Exception as e:
+        logger.exception(f"Execution error for `{content}`: {e}")
+        st.error(f"❌ Failed to execute `{content}`: {e}")
+        if st.session_state.get("debug_mode", False):
+            st.exception(e)
+
+
+def run_visualization(function_to_call, content=""):
+    """
+    Call a visualization function, as its own fragment when
+    PAGE_RENDERING["fragments"] is set.
+    """
+    if not PAGE_RENDERING["fragments"]:
+        function_to_call()
+        return
+    # fragments are identified by their parent container, so each one
+    # gets a container of its own
+    with st.container():
+        _visualization_fragment(function_to_call, content)
+
 
 @log_function_call(logger)
 def load_page_settings(page_name):
@@ -67,7 +98,7 @@ def execute_element_call(element_settings, imported_objects):
     elif element_type == "function":
         try:
             function_to_call = getattr(imported_objects, content)
-            function_to_call()
+            run_visualization(function_to_call, content)
             logger.info(f"Successfully executed function: {content}")
         except AttributeError:
             logger.error(f"Function `{content}` not found in required elements.")
@@ -139,7 +170,7 @@ def execute_visualization(content):
         # Try to access the function if the module is already imported
         if module_name in globals():
             function_to_call = getattr(globals()[module_name], function_name)
-            function_to_call()  # Execute
+            run_visualization(function_to_call, content)  # Execute
             logger.info(f"Successfully executed visualization from global context: {content}")
             return
 
@@ -147,7 +178,7 @@ def execute_visualization(content):
         try:
             module = importlib.import_module(full_module_path)
             function_to_call = getattr(module, function_name)
-            function_to_call()  # Execute visualization
+            run_visualization(function_to_call, content)  # Execute visualization
             logger.info(f"Successfully executed visualization: {content}")
         except ImportError as imp_err:
             logger.error(f"ImportError: Could not load `{full_module_path}`. Error: {imp_err}")
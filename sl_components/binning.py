@@ -0,0 +1,186 @@
+"""
+Description: 2-D binning of weighted, labelled points for the charts.
+
+    Scatter charts of polarity and subjectivity used to plot one marker
+    per distinct (x, y) pair. This module aggregates the points onto a
+    fixed grid with np.bincount and returns one marker per occupied
+    cell, capped at max_markers. Chart payload and render time then
+    depend on the grid size rather than on the number of articles.
+
+    It also builds the label-density grids behind the hexbin charts.
+    Cell counts, the mean label per cell and both marginal histograms
+    come from one vectorized pass.
+
+    Functions:
+    - bin_weighted_points: Aggregates points into grid cells.
+    - aggregate_label_grid: Counts, mean label and marginals on a grid.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_GRID_SIZE = 50
+DEFAULT_MAX_MARKERS = 2500
+
+
+def _cell_index(values, bins, value_range):
+    low, high = value_range
+    span = high - low
+    if span <= 0:
+        return np.zeros(len(values), dtype=np.intp)
+    index = ((values - low) / span * bins).astype(np.intp)
+    # the maximum value belongs to the last bin, not one past it
+    return np.clip(index, 0, bins - 1)
+
+
+def bin_weighted_points(x, y, weights, labels, grid_size=DEFAULT_GRID_SIZE,
+                        x_range=None, y_range=None,
+                        max_markers=DEFAULT_MAX_MARKERS,
+                        split_labels=False):
+    """
+    Aggregate weighted points onto a grid_size x grid_size grid.
+
+    Each occupied cell becomes one marker placed at the weighted centroid
+    of its points. If more than max_markers cells are occupied, only the
+    heaviest cells are kept.
+
+    Parameters:
+        x, y (array-like): Point coordinates. NaN points are dropped.
+        weights (array-like or None): Weight per point (article_count).
+        labels (array-like): 0/1 label per point; 1 counts as real.
+        grid_size (int or (int, int)): Bins along x and y.
+        x_range, y_range (tuple, optional): Grid extent, defaults to the
+            data's min and max.
+        max_markers (int): Hard cap on the number of returned cells.
+        split_labels (bool): Return one row per (cell, label) instead of
+            one row per cell with a real_ratio.
+
+    Returns:
+        pd.DataFrame: Columns x, y, article_count and either real_count
+        and real_ratio, or label (when split_labels).
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    labels = np.asarray(labels)
+    weights = (np.ones_like(x) if weights is None
+               else np.asarray(weights, dtype="float64"))
+    keep = np.isfinite(x) & np.isfinite(y) & np.isfinite(weights)
+    x, y, weights, labels = x[keep], y[keep], weights[keep], labels[keep]
+
+    x_bins, y_bins = ((grid_size, grid_size) if np.isscalar(grid_size)
+                      else grid_size)
+    if not len(x):
+        columns = ["x", "y", "article_count"] + (
+            ["label"] if split_labels else ["real_count", "real_ratio"])
+        return pd.DataFrame(columns=columns)
+
+    x_range = x_range or (x.min(), x.max())
+    y_range = y_range or (y.min(), y.max())
+    cells = (_cell_index(x, x_bins, x_range) * y_bins +
+             _cell_index(y, y_bins, y_range))
+    n_cells = x_bins * y_bins
+
+    if split_labels:
+        # give each (cell, label) pair its own slot
+        label_values, label_codes = np.unique(labels, return_inverse=True)
+        cells = label_codes * n_cells + cells
+        n_cells *= len(label_values)
+
+    totals = np.bincount(cells, weights, minlength=n_cells)
+    sum_x = np.bincount(cells, weights * x, minlength=n_cells)
+    sum_y = np.bincount(cells, weights * y, minlength=n_cells)
+
+    occupied = np.flatnonzero(totals > 0)
+    if len(occupied) > max_markers:
+        heaviest = np.argpartition(totals[occupied], -max_markers)
+        occupied = np.sort(occupied[heaviest[-max_markers:]])
+
+    result = pd.DataFrame({
+        "x": sum_x[occupied] / totals[occupied],
+        "y": sum_y[occupied] / totals[occupied],
+        "article_count": totals[occupied],
+    })
+    if split_labels:
+        result["label"] = label_values[occupied // (x_bins * y_bins)]
+    else:
+        real = np.bincount(cells, weights * (labels == 1),
+                           minlength=n_cells)[occupied]
+        result["real_count"] = real
+        result["real_ratio"] = real / totals[occupied]
+    return result
+
+
+def _covering_range(values, value_range):
+    # value_range widened to the extent of values, (0, 1) without either
+    if not len(values):
+        return tuple(value_range or (0, 1))
+    if not value_range:
+        return values.min(), values.max()
+    return min(value_range[0], values.min()), max(value_range[1],
+                                                  values.max())
+
+
+def aggregate_label_grid(x, y, labels, grid_size=30, x_range=None,
+                         y_range=None, marginal_bins=30, threshold=None):
+    """
+    Aggregate points onto a rectangular grid for a density chart.
+
+    Parameters:
+        x, y (array-like): Point coordinates. NaN points are dropped.
+        labels (array-like): 0/1 label per point.
+        grid_size (int or (int, int)): Cells along x and y.
+        x_range, y_range (tuple, optional): Least grid extent. The grid
+            always covers the data's min and max, so points outside an
+            axis limit still count in the grid and the marginals.
+        marginal_bins (int): Bins of the marginal histograms.
+        threshold (float, optional): Drop points whose |x| or |y| is
+            below it.
+
+    Returns:
+        dict: x_edges, y_edges, counts (x cells by y cells),
+        mean_label (NaN for empty cells), x_hist/x_hist_edges and
+        y_hist/y_hist_edges for the marginals, and n_points.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    labels = np.asarray(labels, dtype="float64")
+    keep = np.isfinite(x) & np.isfinite(y)
+    if threshold:
+        keep &= (np.abs(x) >= threshold) & (np.abs(y) >= threshold)
+    x, y, labels = x[keep], y[keep], labels[keep]
+
+    x_bins, y_bins = ((grid_size, grid_size) if np.isscalar(grid_size)
+                      else grid_size)
+    # every point is binned, as the hexbin did; an explicit range only
+    # widens the grid, limiting the view is left to the axes
+    x_range = _covering_range(x, x_range)
+    y_range = _covering_range(y, y_range)
+
+    x_index = _cell_index(x, x_bins, x_range)
+    y_index = _cell_index(y, y_bins, y_range)
+    cells = x_index * y_bins + y_index
+    n_cells = x_bins * y_bins
+    counts = np.bincount(cells, minlength=n_cells)
+    label_sums = np.bincount(cells, labels, minlength=n_cells)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_label = np.where(counts > 0, label_sums / counts, np.nan)
+
+    x_hist, x_hist_edges = np.histogram(x, bins=marginal_bins,
+                                        range=x_range)
+    y_hist, y_hist_edges = np.histogram(y, bins=marginal_bins,
+                                        range=y_range)
+    return {
+        "x_edges": np.linspace(*x_range, x_bins + 1),
+        "y_edges": np.linspace(*y_range, y_bins + 1),
+        "counts": counts.reshape(x_bins, y_bins),
+        "mean_label": mean_label.reshape(x_bins, y_bins),
+        "x_hist": x_hist,
+        "x_hist_edges": x_hist_edges,
+        "y_hist": y_hist,
+        "y_hist_edges": y_hist_edges,
+        "n_points": len(x),
+    }
+
+
+# Path: sl_components/binning.py
+# end of file
@@ -1,17 +1,44 @@
+import threading
+from collections import OrderedDict
 import pandas as pd
 import streamlit as st
-from sl_components.filters import apply_filters
-from sl_utils.logger import logger
+from sl_components.filters import apply_filters, freeze_filters
+from sl_components.cube import (CUBE_DIMENSIONS, CUBE_MEASURE, get_cube,
+                                get_cube_version)
+from sl_utils.logger import streamlit_logger as logger
+
+
+def _frame_or_cube(df, columns, filters=None):
+    """
+    Return df filtered by filters, or the filtered shared article cube
+    when df is None. The cube can only answer questions about its own
+    dimensions. Filter masks are cached per frame (see filters).
+    """
+    if df is not None:
+        return apply_filters(df, filters)
+    missing = [col for col in [*columns, *(filters or {})]
+               if col not in CUBE_DIMENSIONS]
+    if missing:
+        raise ValueError(f"Columns {missing} are not cube dimensions;"
+                         " pass the DataFrame instead.")
+    return apply_filters(get_cube(), filters)
 
 
 # Convert placeholder date to datetime once
 
 def count_unique_records(df, column, filters=None):
-    """Counts unique donors based on a specific DonationType."""
-    df = apply_filters(df, filters)
+    """Counts unique donors based on a specific DonationType.
+    Pass df=None to answer from the article cube."""
+    df = _frame_or_cube(df, [column], filters)
     return df[column].nunique()
 
 
+def count_articles(df=None, filters=None):
+    """Sums article_count, from the article cube when df is None."""
+    df = _frame_or_cube(df, [], filters)
+    return df["article_count"].sum()
+
+
 def count_missing_values(df, column, missing_value, filters=None):
     """Counts donations where a specific column has a given missing value."""
     df = apply_filters(df, filters)
@@ -43,11 +70,16 @@ def get_top_or_bottom_entity_by_column(df,
         filters (dict, optional): Dictionary where keys are column names
         and values are filter conditions.
 
+        With df=None and value_column "article_count" the answer
+        comes from the article cube.
+
     Returns:
         tuple: (EntityName, Value)
     """
-    df = apply_filters(df, filters)
-    grouped = df.groupby(column)[value_column].sum()
+    if df is None and value_column != "article_count":
+        raise ValueError("Only article_count can be summed from the cube.")
+    df = _frame_or_cube(df, [column], filters)
+    grouped = df.groupby(column, observed=True)[value_column].sum()
     if top:
         entity = grouped.idxmax()
         value = grouped.max()
@@ -57,6 +89,147 @@ def get_top_or_bottom_entity_by_column(df,
     return entity, value
 
 
+KPI_TYPES = ("nunique", "count_missing", "count_null", "sum",
+             "top", "bottom", "mean_by", "sum_by")
+# the cube holds one row per combination of dimension values, not per
+# article, so only sums of article_count and distinct dimension values
+# come out the same as from the articles
+CUBE_KPI_TYPES = ("nunique", "sum", "top", "bottom", "sum_by")
+MAX_CACHED_KPI_BATCHES = 128
+_kpi_cache = OrderedDict()
+_kpi_cache_lock = threading.Lock()
+
+
+def _check_cube_metrics(metrics, filters):
+    """Raise ValueError for metrics or filters the cube cannot answer."""
+    missing = [col for col in filters or {} if col not in CUBE_DIMENSIONS]
+    for metric in metrics:
+        kind = metric["type"]
+        if kind not in CUBE_KPI_TYPES:
+            raise ValueError(f"KPI type {kind} cannot be computed from the"
+                             " cube; pass the DataFrame instead.")
+        if kind != "nunique" and metric.get(
+                "value_column", metric.get("column")) != CUBE_MEASURE:
+            raise ValueError(f"KPI {metric.get('name', kind)} must sum"
+                             f" {CUBE_MEASURE} to use the cube;"
+                             " pass the DataFrame instead.")
+        missing += [col for col in (metric.get("column"),
+                                    metric.get("group_by"))
+                    if col not in (None, CUBE_MEASURE)
+                    and col not in CUBE_DIMENSIONS]
+    if missing:
+        raise ValueError(f"Columns {missing} are not cube dimensions;"
+                         " pass the DataFrame instead.")
+
+
+def _evaluate_kpis(df, metrics):
+    results = {}
+    # top/bottom/*_by metrics over the same columns share one groupby
+    grouped = {}
+
+    def group(column, value_column, agg):
+        key = (column, value_column, agg)
+        if key not in grouped:
+            grouped[key] = (df.groupby(column, observed=True)[value_column]
+                            .agg(agg))
+        return grouped[key]
+
+    for metric in metrics:
+        kind = metric["type"]
+        column = metric.get("column")
+        if kind == "nunique":
+            value = df[column].nunique()
+        elif kind == "count_missing":
+            value = int(df[column].eq(metric["missing_value"]).sum())
+        elif kind == "count_null":
+            value = int(df[column].isna().sum())
+        elif kind == "sum":
+            value = df[column].sum()
+        elif kind in ("top", "bottom"):
+            sums = group(column, metric["value_column"], "sum")
+            if kind == "top":
+                value = (sums.idxmax(), sums.max())
+            else:
+                value = (sums.idxmin(), sums.min())
+        elif kind in ("mean_by", "sum_by"):
+            agg = "mean" if kind == "mean_by" else "sum"
+            value = group(metric["group_by"], metric["value_column"], agg)
+        else:
+            raise ValueError(f"Unsupported KPI type: {kind}."
+                             f" Use one of {KPI_TYPES}.")
+        results[metric.get("name", kind)] = value
+    return results
+
+
+def _copy_kpis(results):
+    # cached results are shared between sessions, so callers get their
+    # own Series/DataFrames and may change them in place
+    return {name: value.copy() if hasattr(value, "copy") else value
+            for name, value in results.items()}
+
+
+def compute_kpis(df, metrics, filters=None, logical_operator="or",
+                 dataset_version=None):
+    """
+    Evaluate several KPIs over one filtered view of the data.
+
+    The filters are applied once and every metric is computed from the
+    same view. Metrics that group by the same columns share a groupby.
+    When dataset_version is given, the whole result is cached for that
+    version, filter set and metric list.
+
+    Parameters:
+        df (pd.DataFrame or None): The dataset, or None to use the
+            article cube (which then also supplies dataset_version).
+            The cube only answers CUBE_KPI_TYPES metrics over cube
+            dimensions, with article_count as the summed column, and
+            filters on cube dimensions; anything else raises ValueError.
+        metrics (list): Metric specs, each a dict with a "type" and an
+            optional "name" (the result key, defaults to the type):
+              {"type": "nunique", "column": ...}
+              {"type": "count_missing", "column": ..., "missing_value": ...}
+              {"type": "count_null", "column": ...}
+              {"type": "sum", "column": ...}
+              {"type": "top" / "bottom", "column": ..., "value_column": ...}
+              {"type": "mean_by" / "sum_by", "group_by": ...,
+               "value_column": ...}
+        filters (dict, optional): Shared apply_filters conditions.
+        logical_operator (str, optional): Passed to apply_filters.
+        dataset_version (str, optional): Version of the shared dataset
+            df is; enables the result cache. Filter masks are cached
+            per frame regardless.
+
+    Returns:
+        dict: Metric name -> value. top/bottom give (EntityName, Value),
+        mean_by/sum_by give a Series indexed by the group. Values are
+        copies the caller may modify.
+    """
+    if df is None:
+        _check_cube_metrics(metrics, filters)
+        df = get_cube()
+        dataset_version = get_cube_version()
+
+    key = None
+    if dataset_version is not None:
+        key = (dataset_version,
+               tuple(freeze_filters(metric) for metric in metrics),
+               freeze_filters(filters), logical_operator)
+        with _kpi_cache_lock:
+            if key in _kpi_cache:
+                _kpi_cache.move_to_end(key)
+                return _copy_kpis(_kpi_cache[key])
+
+    view = apply_filters(df, filters, logical_operator)
+    results = _evaluate_kpis(view, metrics)
+
+    if key is not None:
+        with _kpi_cache_lock:
+            _kpi_cache[key] = results
+            while len(_kpi_cache) > MAX_CACHED_KPI_BATCHES:
+                _kpi_cache.popitem(last=False)
+    return _copy_kpis(results)
+
+
 def format_number(value):
     if value >= 1_000_000:
         return f"{value / 1_000_000:,.1f}M"
@@ -103,16 +276,20 @@ def calculate_agg_by_variable(
     # Calculate aggregate measures by allocated entity
     if agg_type == "mean":
         agg_df = datafile.groupby(groupby_variable,
-                                  as_index=False)[agg_variable].mean()
+                                  as_index=False,
+                                  observed=True)[agg_variable].mean()
     elif agg_type == "sum":
         agg_df = datafile.groupby(groupby_variable,
-                                  as_index=False)[agg_variable].sum()
+                                  as_index=False,
+                                  observed=True)[agg_variable].sum()
     elif agg_type == "count":
         agg_df = datafile.groupby(groupby_variable,
-                                  as_index=False)[agg_variable].count()
+                                  as_index=False,
+                                  observed=True)[agg_variable].count()
     elif agg_type == "nunique":
         agg_df = datafile.groupby(groupby_variable,
-                                  as_index=False)[agg_variable].nunique()
+                                  as_index=False,
+                                  observed=True)[agg_variable].nunique()
     else:
         raise ValueError(f"Unsupported aggregation type: {agg_type}")
 
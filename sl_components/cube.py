@@ -0,0 +1,107 @@
+"""
+Description: Pre-aggregated article-count cube for the dashboard data.
+
+    The cube sums article_count over every observed combination of
+    CUBE_DIMENSIONS and is built once per dataset version when the app
+    loads. Charts and KPIs ask for roll-ups of it (sums over a subset of
+    the dimensions) instead of grouping the raw frame on every rerun, so
+    their cost depends on the number of distinct combinations rather than
+    the number of articles.
+
+    Functions:
+    - build_cube: Aggregates a dashboard frame into a cube.
+    - get_cube: Returns the shared cube for the current dataset version.
+    - rollup: Returns a memoized roll-up of the cube.
+"""
+
+import threading
+from collections import OrderedDict
+import streamlit as st
+from sl_utils.logger import log_function_call, streamlit_logger as logger
+from sl_components.filters import apply_filters, freeze_filters
+from sl_data_for_dashboard.dataset_store import (get_dataset,
+                                                 get_dataset_version,
+                                                 )
+
+# date_clean is already the first day of the month, i.e. year-month
+CUBE_DIMENSIONS = ["label", "subject", "source_name", "media_type",
+                   "day_label", "unique_location_count", "date_clean"]
+CUBE_MEASURE = "article_count"
+
+MAX_ROLLUPS = 64  # memoized roll-ups kept per process
+_rollups = OrderedDict()
+_rollups_lock = threading.Lock()
+
+
+@log_function_call(logger)
+def build_cube(df):
+    """
+    Sum article_count over all observed combinations of the cube
+    dimensions present in df.
+
+    Missing dimension values are kept as their own group so roll-ups
+    over the other dimensions still see every article.
+
+    Returns:
+        pd.DataFrame: One row per combination with an article_count column.
+    """
+    dimensions = [col for col in CUBE_DIMENSIONS if col in df.columns]
+    cube = (df.groupby(dimensions, observed=True, dropna=False)
+            .agg(article_count=(CUBE_MEASURE, "sum"))
+            .reset_index())
+    logger.info(f"Built article cube: {len(df):,} rows ->"
+                f" {len(cube):,} cells over {dimensions}")
+    return cube
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _shared_cube(version):
+    return build_cube(get_dataset("data_clean"))
+
+
+def get_cube():
+    """Return the cube for the current version of the dashboard data."""
+    return _shared_cube(get_dataset_version("data_clean"))
+
+
+def get_cube_version():
+    """Return the dataset version key of the current cube."""
+    return f"cube:{get_dataset_version('data_clean')}"
+
+
+def rollup(group_by, filters=None, logical_operator="or"):
+    """
+    Sum article_count over the cube grouped by the given dimensions.
+
+    Parameters:
+        group_by (list): Cube dimensions to keep.
+        filters (dict, optional): apply_filters conditions on cube
+            dimensions, applied before rolling up.
+        logical_operator (str, optional): Passed to apply_filters.
+
+    Returns:
+        pd.DataFrame: group_by columns plus article_count. The frame is
+        shared between callers and must not be modified.
+    """
+    version = get_cube_version()
+    key = (version, tuple(group_by), freeze_filters(filters),
+           logical_operator)
+    with _rollups_lock:
+        if key in _rollups:
+            _rollups.move_to_end(key)
+            return _rollups[key]
+
+    cube = apply_filters(get_cube(), filters, logical_operator)
+    result = (cube.groupby(list(group_by), observed=True)
+              .agg(article_count=(CUBE_MEASURE, "sum"))
+              .reset_index())
+
+    with _rollups_lock:
+        _rollups[key] = result
+        while len(_rollups) > MAX_ROLLUPS:
+            _rollups.popitem(last=False)
+    return result
+
+
+# Path: sl_components/cube.py
+# end of file
@@ -1,13 +1,200 @@
+import threading
+import weakref
+from collections import OrderedDict
 import numpy as np
+import pandas as pd
 from sl_utils.logger import streamlit_logger as logger
 from sl_utils.logger import log_function_call  # Import decorator
 
 
+def freeze_filters(providedfilters):
+    """
+    Return a hashable, order-independent form of a filter dict so it can
+    be used as part of a cache key.
+    """
+    if not providedfilters:
+        return ()
+
+    def _freeze(value):
+        if isinstance(value, dict):
+            return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple, set)):
+            return tuple(sorted((_freeze(v) for v in value), key=repr))
+        return value
+
+    return _freeze(providedfilters)
+
+
+def temporal_index_name(date_column):
+    """Name of the sorted DatetimeIndex built from date_column on load."""
+    return f"{date_column}_index"
+
+
+def _has_temporal_index(df, date_column):
+    return (df.index.name == temporal_index_name(date_column)
+            and df.index.is_monotonic_increasing)
+
+
+def date_bounds(df, date_column):
+    """Return the first and last timestamp in date_column."""
+    if _has_temporal_index(df, date_column) and len(df):
+        return df.index[0], df.index[-1]
+    dates = pd.to_datetime(df[date_column])
+    return dates.min(), dates.max()
+
+
 def filter_by_date(df, start_date, end_date, date_column="ReceivedDate"):
-    """Filter the DataFrame by a given date range."""
+    """Filter the DataFrame by a given date range.
+
+    Frames indexed by date_column (see data_load.apply_schema) are sliced
+    with two binary searches, returning a view rather than a copy.
+    """
+    if _has_temporal_index(df, date_column):
+        start = df.index.searchsorted(pd.Timestamp(start_date), side="left")
+        end = df.index.searchsorted(pd.Timestamp(end_date), side="right")
+        return df.iloc[start:end]
     return df[(df[date_column] >= start_date) & (df[date_column] <= end_date)]
 
 
+def _list_mask(series, values):
+    """Mask of rows whose value, compared as a string, is in values."""
+    wanted = [str(v) for v in values]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # match against the categories once, then test the integer codes
+        categories = series.cat.categories
+        codes = np.flatnonzero(categories.astype(str).isin(wanted))
+        return np.isin(series.cat.codes.to_numpy(), codes)
+    # only the distinct values are converted to strings
+    uniques = pd.Index(series.unique())
+    keep = uniques[uniques.astype(str).isin(wanted)]
+    return series.isin(keep).to_numpy()
+
+
+def _column_mask(series, value):
+    """Boolean mask for one filter condition, or None to skip it."""
+    if isinstance(value, (list, tuple, set)):
+        return _list_mask(series, value)
+    if isinstance(value, dict):
+        if "min" in value and "max" in value:
+            return ((series >= value["min"]) &
+                    (series <= value["max"])).to_numpy()
+        elif "min" in value:
+            return (series >= value["min"]).to_numpy()
+        elif "max" in value:
+            return (series <= value["max"]).to_numpy()
+        return None
+    # Single value filtering
+    return (series == value).to_numpy()
+
+
+MAX_CACHED_MASKS = 256  # per-(column, value) masks kept per frame
+# id(df) -> (weakref to df, LRU of (column, filter) -> (values, mask));
+# frames are unhashable, so entries are keyed by id and dropped when
+# their frame is collected
+_mask_cache = {}
+_mask_cache_lock = threading.Lock()
+
+
+def _column_values(series):
+    # the array the column's data lives in; a column that is replaced or
+    # written to (copy-on-write) gets a new one
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array.codes
+    return series.to_numpy()
+
+
+def _same_data(cached, values):
+    return (cached.__array_interface__["data"][0]
+            == values.__array_interface__["data"][0]
+            and cached.shape == values.shape
+            and cached.strides == values.strides
+            and cached.dtype == values.dtype)
+
+
+def _frame_masks(df):
+    """Return the mask LRU of df, creating it on first use."""
+    key = id(df)
+    with _mask_cache_lock:
+        cached = _mask_cache.get(key)
+        if cached is not None and cached[0]() is df:
+            return cached[1]
+        masks = OrderedDict()
+        _mask_cache[key] = (weakref.ref(df), masks)
+    weakref.finalize(df, _mask_cache.pop, key, None)
+    return masks
+
+
+def _cached_column_mask(df, column, value):
+    """
+    Return _column_mask(df[column], value), cached per frame. A hit is
+    only used while the column still holds the very data the mask was
+    computed from, so replaced columns and copy-on-write copies (every
+    write to a view of a shared dataset) miss. The cached values array
+    is kept alive with the mask, so its address cannot be reused by
+    another column. A frame that owns its data and is written in place
+    keeps the same array; don't filter such a frame, write to it, and
+    filter it again.
+    """
+    series = df[column]
+    values = _column_values(series)
+    masks = _frame_masks(df)
+    key = (column, freeze_filters({column: value}))
+    with _mask_cache_lock:
+        cached = masks.get(key)
+        if cached is not None and _same_data(cached[0], values):
+            masks.move_to_end(key)
+            return cached[1]
+
+    mask = _column_mask(series, value)
+    if mask is None:
+        return None
+    mask.flags.writeable = False  # shared between callers
+    with _mask_cache_lock:
+        masks[key] = (values, mask)
+        while len(masks) > MAX_CACHED_MASKS:
+            masks.popitem(last=False)
+    return mask
+
+
+def compile_filters(df, providedfilters=None, logical_operator="or"):
+    """
+    Turn a filter dict into a single boolean mask over df.
+
+    List filters on categorical columns are tested against the integer
+    category codes. Other columns convert only their distinct values to
+    strings. Each per-(column, value) mask is kept in an LRU cache tied
+    to df itself, so repeated filters on the same frame (e.g. a
+    session's dataset across reruns) are computed once.
+
+    Returns:
+        np.ndarray or None: The combined mask, or None if no filter
+        applies.
+    """
+    if logical_operator not in ("and", "or", "nor", "except"):
+        raise ValueError("logical_operator must be 'and', 'or', 'nor', or 'except'")
+    if not providedfilters:
+        return None
+
+    conditions = []
+    for column, value in providedfilters.items():
+        if value is None or value == []:  # Skip empty filters
+            continue
+        mask = _cached_column_mask(df, column, value)
+        if mask is not None:
+            conditions.append(mask)
+
+    if not conditions:  # If no valid filters, there is nothing to apply
+        return None
+
+    if logical_operator == "and":
+        return np.logical_and.reduce(conditions)
+    elif logical_operator == "or":
+        return np.logical_or.reduce(conditions)
+    elif logical_operator == "nor":
+        return ~np.logical_or.reduce(conditions)
+    return ~np.logical_and.reduce(conditions)  # "except"
+
+
 @log_function_call(logger)
 def apply_filters(df, providedfilters=None, logical_operator="or"):
     """
@@ -24,40 +211,8 @@ def apply_filters(df, providedfilters=None, logical_operator="or"):
     Returns:
         pd.DataFrame: Filtered DataFrame.
     """
-    # If no filters provided, return original DataFrame
-    if not providedfilters:
-        return df
-
-    conditions = []
-    for column, value in providedfilters.items():
-        if value is None or value == []:  # Skip empty filters
-            continue
-        if isinstance(value, (list, tuple, set)):
-            if df[column].dtype == "O":  # Check if categorical
-                value = [str(v) for v in value]  # Ensure all values are strings
-            conditions.append(df[column].astype(str).isin(value))
-        elif isinstance(value, dict):
-            if "min" in value and "max" in value:
-                conditions.append((df[column] >= value["min"]) & (df[column] <= value["max"]))
-            elif "min" in value:
-                conditions.append(df[column] >= value["min"])
-            elif "max" in value:
-                conditions.append(df[column] <= value["max"])
-        else:  # Single value filtering
-            conditions.append(df[column] == value)
-
-    if not conditions:  # If no valid filters, return the original DataFrame
+    final_condition = compile_filters(df, providedfilters, logical_operator)
+    # If no filters apply, return original DataFrame
+    if final_condition is None:
         return df
-
-    if logical_operator == "and":
-        final_condition = np.logical_and.reduce(conditions)
-    elif logical_operator == "or":
-        final_condition = np.logical_or.reduce(conditions)
-    elif logical_operator == "nor":
-        final_condition = ~np.logical_or.reduce(conditions)
-    elif logical_operator == "except":
-        final_condition = ~np.logical_and.reduce(conditions)
-    else:
-        raise ValueError("logical_operator must be 'and', 'or', 'nor', or 'except'")
-
     return df[final_condition]
@@ -0,0 +1,174 @@
+"""
+Description: Continent > subcontinent > country > state index of the map
+    data.
+
+    The hierarchy is built once per map dataset version. Every distinct
+    (continent, subcontinent, country, state) path is a leaf. Each level
+    has integer node ids, and every node knows its parent. Counts kept
+    per leaf roll up to any level with one np.bincount, so switching
+    levels or drilling into a region needs no new scan of the articles.
+
+    Nodes are identified by their full path: a state called Georgia in
+    the United States is a different node from one of the same name
+    elsewhere. The map draws locations by name, so node totals can also
+    be merged per name (see rollup_by_name).
+
+    Functions:
+    - build_geo_hierarchy: Builds the index from map data.
+    - get_geo_hierarchy: Returns the shared index for the current data.
+    - rollup: Sums leaf values up to the nodes of a level.
+    - rollup_by_name: Merges node values per location name of a level.
+    - ancestor_ids: Maps the nodes of a level to their ancestors.
+    - nodes_within: Mask of the nodes below a named ancestor.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sl_utils.logger import log_function_call, streamlit_logger as logger
+from sl_data_for_dashboard.dataset_store import (get_dataset,
+                                                 get_dataset_version,
+                                                 )
+
+GEO_LEVELS = ["continent", "subcontinent", "country", "state"]
+# name of the node standing in for a missing level value, so a row
+# without a state still counts for its country, continent, ...
+UNKNOWN_LOCATION = "(unknown)"
+
+
+def _fill_unknown(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if UNKNOWN_LOCATION not in values.cat.categories:
+            values = values.cat.add_categories(UNKNOWN_LOCATION)
+    return values.fillna(UNKNOWN_LOCATION)
+
+
+@log_function_call(logger)
+def build_geo_hierarchy(articles, levels=GEO_LEVELS):
+    """
+    Build the geographic hierarchy of the map data.
+
+    Parameters:
+        articles (pd.DataFrame): Map data with one column per level.
+        levels (list): Level columns, from the top of the tree down.
+
+    Returns:
+        dict: levels; row_leaf (leaf id of each row; missing level
+        values become UNKNOWN_LOCATION nodes); and per level: names
+        (node names),
+        leaf_nodes (node id of each leaf), parents (parent node id of
+        each node, None for the top level), name_index (unique names)
+        and node_names (name id of each node).
+    """
+    paths = articles[levels]
+    missing = paths.isna().any(axis=1)
+    if missing.any():
+        logger.info(f"{int(missing.sum()):,} map rows miss part of their"
+                    f" location; those levels become {UNKNOWN_LOCATION}")
+        paths = paths.apply(_fill_unknown)
+    grouped = paths.groupby(levels, observed=True, sort=True)
+    row_leaf = grouped.ngroup().fillna(-1).to_numpy("int64")
+    leaves = grouped.size().index.to_frame(index=False)
+
+    hierarchy = {"levels": list(levels), "row_leaf": row_leaf,
+                 "n_leaves": len(leaves), "names": {}, "leaf_nodes": {},
+                 "parents": {}, "name_index": {}, "node_names": {}}
+    for depth, level in enumerate(levels):
+        prefix = leaves.groupby(levels[:depth + 1], observed=True,
+                                sort=True)
+        leaf_nodes = prefix.ngroup().to_numpy("int64")
+        # position of the first leaf of each node, in node id order
+        first_leaf = np.unique(leaf_nodes, return_index=True)[1]
+        names = leaves[level].to_numpy()[first_leaf]
+        node_names, name_index = pd.factorize(names, sort=True)
+
+        hierarchy["leaf_nodes"][level] = leaf_nodes
+        hierarchy["names"][level] = names
+        hierarchy["name_index"][level] = pd.Index(name_index)
+        hierarchy["node_names"][level] = node_names
+        hierarchy["parents"][level] = (
+            None if depth == 0
+            else hierarchy["leaf_nodes"][levels[depth - 1]][first_leaf])
+
+    logger.info("Built geo hierarchy: " + ", ".join(
+        f"{len(hierarchy['names'][level]):,} {level}" for level in levels))
+    return hierarchy
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _shared_geo_hierarchy(version):
+    return build_geo_hierarchy(get_dataset("data_for_map"))
+
+
+def get_geo_hierarchy():
+    """Return the hierarchy of the current map data."""
+    return _shared_geo_hierarchy(get_dataset_version("data_for_map"))
+
+
+def _bincount_columns(ids, values, length):
+    values = np.asarray(values)
+    if values.ndim == 1:
+        return np.bincount(ids, values, minlength=length)
+    return np.stack([np.bincount(ids, values[:, i], minlength=length)
+                     for i in range(values.shape[1])], axis=-1)
+
+
+def rollup(hierarchy, leaf_values, level):
+    """
+    Sum per-leaf values up to the nodes of level.
+
+    Parameters:
+        hierarchy (dict): From build_geo_hierarchy.
+        leaf_values (np.ndarray): One value, or row of values, per leaf.
+        level (str): Target level.
+
+    Returns:
+        np.ndarray: One value (row) per node of level.
+    """
+    return _bincount_columns(hierarchy["leaf_nodes"][level], leaf_values,
+                             len(hierarchy["names"][level]))
+
+
+def rollup_by_name(hierarchy, node_values, level, node_mask=None):
+    """
+    Merge per-node values of level by location name.
+
+    Parameters:
+        node_values (np.ndarray): One value (row) per node, e.g. from
+            rollup.
+        node_mask (np.ndarray, optional): Nodes to include.
+
+    Returns:
+        (pd.Index, np.ndarray): Names and their summed values.
+    """
+    node_names = hierarchy["node_names"][level]
+    node_values = np.asarray(node_values)
+    if node_mask is not None:
+        node_values = node_values * (
+            node_mask if node_values.ndim == 1 else node_mask[:, None])
+    return (hierarchy["name_index"][level],
+            _bincount_columns(node_names, node_values,
+                              len(hierarchy["name_index"][level])))
+
+
+def ancestor_ids(hierarchy, level, ancestor_level):
+    """Return, for each node of level, its node id at ancestor_level."""
+    levels = hierarchy["levels"]
+    ids = np.arange(len(hierarchy["names"][level]))
+    for depth in range(levels.index(level), levels.index(ancestor_level),
+                       -1):
+        ids = hierarchy["parents"][levels[depth]][ids]
+    return ids
+
+
+def nodes_within(hierarchy, level, ancestor_level, ancestor_name):
+    """
+    Return a boolean mask of the nodes of level that lie under an
+    ancestor_level node called ancestor_name.
+    """
+    ancestors = ancestor_ids(hierarchy, level, ancestor_level)
+    return hierarchy["names"][ancestor_level][ancestors] == ancestor_name
+
+
+# Path: sl_components/geo_hierarchy.py
+# end of file
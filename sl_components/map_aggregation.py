@@ -0,0 +1,256 @@
+"""
+Description: Prefix-sum aggregation of map mentions by location and day.
+
+    The map page sums fake and real mentions per location over a date
+    range chosen with a slider. Instead of filtering and grouping the
+    articles frame for every slider position, a prefix index is built
+    once per dataset version. It holds the cumulative counts per (day,
+    leaf of the geo hierarchy), so any date range is the difference of
+    two rows of that array. The range totals are then rolled up to the
+    selected level with the hierarchy (see geo_hierarchy). A query costs
+    O(locations), whatever the number of articles or days in the range.
+
+    Functions:
+    - build_prefix_index: Builds the cumulative counts per location.
+    - get_prefix_index: Returns the shared index of the map data.
+    - range_counts: Per-location totals between two dates.
+    - aggregate_map_counts: Map totals of a level between two dates.
+    - build_monthly_frames: Dense month by location counts of a level.
+    - get_monthly_frames: Shared monthly frames for the time-lapse map.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sl_utils.logger import log_function_call, streamlit_logger as logger
+from sl_components.geo_hierarchy import (get_geo_hierarchy,
+                                         ancestor_ids,
+                                         nodes_within,
+                                         GEO_LEVELS,
+                                         UNKNOWN_LOCATION,
+                                         rollup,
+                                         rollup_by_name,
+                                         )
+from sl_data_for_dashboard.dataset_store import (get_dataset,
+                                                 get_dataset_version,
+                                                 )
+
+MAP_MEASURES = ["fake_count", "real_count"]
+# kept alongside the measures so locations without rows in a range
+# can be told apart from locations whose counts add up to zero
+ROW_COUNT = "row_count"
+INDEX_COLUMNS = MAP_MEASURES + [ROW_COUNT]
+
+
+@log_function_call(logger)
+def build_prefix_index(articles, location_codes, n_locations,
+                       date_col="date"):
+    """
+    Build cumulative mention counts per day and location.
+
+    Parameters:
+        articles (pd.DataFrame): Map data with date_col and the
+            MAP_MEASURES columns.
+        location_codes (np.ndarray): Location id of each row, -1 for
+            rows without a location.
+        n_locations (int): Number of location ids.
+        date_col (str): Date column.
+
+    Returns:
+        dict: days (sorted datetime64[D] array) and cumulative, an array
+        of shape (len(days) + 1, n_locations, len(INDEX_COLUMNS)) whose
+        row i holds the totals of all days before days[i].
+    """
+    dates = (pd.to_datetime(articles[date_col], errors="coerce")
+             .to_numpy("datetime64[D]"))
+    valid = ~np.isnat(dates) & (location_codes >= 0)
+
+    days, day_codes = np.unique(dates[valid], return_inverse=True)
+    n_days = len(days)
+    cells = day_codes * n_locations + location_codes[valid]
+
+    weights = [articles[m].fillna(0).to_numpy("float64")[valid]
+               for m in MAP_MEASURES] + [None]
+    counts = np.stack([np.bincount(cells, w, minlength=n_days * n_locations)
+                       for w in weights], axis=-1)
+    cumulative = np.zeros((n_days + 1, n_locations, len(INDEX_COLUMNS)),
+                          dtype="int64")
+    np.cumsum(counts.reshape(n_days, n_locations, len(INDEX_COLUMNS)),
+              axis=0, out=cumulative[1:])
+
+    logger.info(f"Built map prefix index: {n_days:,} days"
+                f" x {n_locations:,} locations")
+    return {"days": days, "cumulative": cumulative}
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _shared_prefix_index(version):
+    hierarchy = get_geo_hierarchy()
+    return build_prefix_index(get_dataset("data_for_map"),
+                              hierarchy["row_leaf"], hierarchy["n_leaves"])
+
+
+def get_prefix_index():
+    """
+    Return the prefix index of the current map data, with the leaves
+    of the geo hierarchy as locations.
+    """
+    return _shared_prefix_index(get_dataset_version("data_for_map"))
+
+
+def range_counts(index, start, end):
+    """
+    Sum the INDEX_COLUMNS per location over the days from start to end
+    (both included).
+
+    Returns:
+        np.ndarray: Shape (locations, len(INDEX_COLUMNS)).
+    """
+    days = index["days"]
+    low = np.searchsorted(days, np.datetime64(pd.Timestamp(start), "D"),
+                          side="left")
+    high = np.searchsorted(days, np.datetime64(pd.Timestamp(end), "D"),
+                           side="right")
+    return index["cumulative"][max(high, low)] - index["cumulative"][low]
+
+
+def aggregate_map_counts(start, end, group_col, within=None,
+                         by_country=False):
+    """
+    Return fake and real mentions per group_col location between start
+    and end, for the current map data.
+
+    Parameters:
+        start, end: First and last day of the range.
+        group_col (str): Geo level, one of geo_hierarchy.GEO_LEVELS.
+        within (tuple, optional): (ancestor level, name) to drill into,
+            e.g. ("continent", "Europe").
+        by_country (bool): For levels above country, return one row per
+            country carrying its group's totals, for maps drawn by
+            country.
+
+    Returns:
+        pd.DataFrame: group_col and the MAP_MEASURES columns (plus
+        country when by_country), one row per location with data in
+        the range.
+    """
+    hierarchy = get_geo_hierarchy()
+    leaf_totals = range_counts(get_prefix_index(), start, end)
+    node_totals = rollup(hierarchy, leaf_totals, group_col)
+    node_mask = (None if within is None
+                 else nodes_within(hierarchy, group_col, *within))
+    names, totals = rollup_by_name(hierarchy, node_totals, group_col,
+                                   node_mask)
+    totals = totals.astype("int64")  # bincount sums in float64
+    # rows missing this level still count at the levels above it, but
+    # there is no location to draw for them here
+    present = ((totals[:, INDEX_COLUMNS.index(ROW_COUNT)] > 0)
+               & (names != UNKNOWN_LOCATION))
+
+    if not by_country:
+        result = pd.DataFrame(totals[present][:, :len(MAP_MEASURES)],
+                              columns=MAP_MEASURES)
+        result.insert(0, group_col, names[present])
+        return result
+
+    # every country is coloured with the totals of its group
+    group_names = hierarchy["node_names"][group_col][
+        ancestor_ids(hierarchy, "country", group_col)]
+    keep = present[group_names] & (hierarchy["names"]["country"]
+                                   != UNKNOWN_LOCATION)
+    if within is not None:
+        keep &= nodes_within(hierarchy, "country", *within)
+    result = pd.DataFrame(totals[group_names[keep]][:, :len(MAP_MEASURES)],
+                          columns=MAP_MEASURES)
+    result.insert(0, group_col, names[group_names[keep]])
+    result["country"] = hierarchy["names"]["country"][keep]
+    return result
+
+
+@log_function_call(logger)
+def build_monthly_frames(index, hierarchy, group_col, within=None,
+                         by_country=False):
+    """
+    Build dense monthly counts for every location of a level, the
+    frames of the time-lapse map.
+
+    Month totals are differences of the prefix index at month starts,
+    rolled up to group_col by name in one vectorized step.
+
+    Parameters:
+        index (dict): From build_prefix_index, over hierarchy leaves.
+        hierarchy (dict): From geo_hierarchy.build_geo_hierarchy.
+        group_col (str): Geo level.
+        within (tuple, optional): (ancestor level, name) to drill into.
+        by_country (bool): Return one column per country carrying its
+            group's counts, as aggregate_map_counts does.
+
+    Returns:
+        dict: months (datetime64[M], every month from the first to the
+        last day of data), locations (names, or countries when
+        by_country), groups (group_col name of each location) and
+        fake_count / real_count arrays of shape (months, locations).
+    """
+    days = index["days"]
+    months = np.arange(days[0].astype("datetime64[M]"),
+                       days[-1].astype("datetime64[M]") + 1)
+    edges = np.append(np.searchsorted(days, months.astype("datetime64[D]")),
+                      len(days))
+    cumulative = index["cumulative"]
+    monthly = cumulative[edges[1:]] - cumulative[edges[:-1]]
+
+    leaf_level = hierarchy["levels"][-1]
+    if within is not None:
+        leaf_mask = nodes_within(hierarchy, leaf_level, *within)[
+            hierarchy["leaf_nodes"][leaf_level]]
+        monthly = monthly * leaf_mask[None, :, None]
+
+    leaf_names = hierarchy["node_names"][group_col][
+        hierarchy["leaf_nodes"][group_col]]
+    names = hierarchy["name_index"][group_col]
+    by_name = np.zeros((len(months), len(names), len(INDEX_COLUMNS)),
+                       dtype="int64")
+    np.add.at(by_name, (slice(None), leaf_names), monthly)
+
+    # only locations with data somewhere in the range are drawn
+    present = ((by_name[:, :, INDEX_COLUMNS.index(ROW_COUNT)].sum(axis=0)
+                > 0) & (names != UNKNOWN_LOCATION))
+    if by_country:
+        columns = hierarchy["node_names"][group_col][
+            ancestor_ids(hierarchy, "country", group_col)]
+        keep = present[columns] & (hierarchy["names"]["country"]
+                                   != UNKNOWN_LOCATION)
+        if within is not None:
+            keep &= nodes_within(hierarchy, "country", *within)
+        columns = columns[keep]
+        locations = hierarchy["names"]["country"][keep]
+    else:
+        columns = np.flatnonzero(present)
+        locations = np.asarray(names[columns])
+
+    frames = {"months": months, "locations": locations,
+              "groups": np.asarray(names[columns])}
+    for i, measure in enumerate(MAP_MEASURES):
+        frames[measure] = by_name[:, columns, i]
+    return frames
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _shared_monthly_frames(version, group_col, within, by_country):
+    return build_monthly_frames(get_prefix_index(), get_geo_hierarchy(),
+                                group_col, within, by_country)
+
+
+def get_monthly_frames(group_col, within=None, by_country=False):
+    """
+    Return build_monthly_frames of the current map data, built once per
+    dataset version and arguments.
+    """
+    if group_col not in GEO_LEVELS:
+        raise ValueError(f"Unknown geographic level: {group_col}")
+    return _shared_monthly_frames(get_dataset_version("data_for_map"),
+                                  group_col, within, by_country)
+
+
+# Path: sl_components/map_aggregation.py
+# end of file
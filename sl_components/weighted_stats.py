@@ -0,0 +1,189 @@
+"""
+Description: Weighted distribution statistics for violin and box plots.
+
+    Each row of the dashboard data stands for article_count articles.
+    These helpers compute densities and quantiles using those counts as
+    weights. Rows are never repeated, and no sampling is involved. The
+    results are in the dict formats that matplotlib's Axes.violin and
+    Axes.bxp draw directly.
+
+    Functions:
+    - weighted_quantiles: Quantiles of weighted values.
+    - weighted_violin_stats: Density curve and summary for one violin.
+    - weighted_box_stats: Box-and-whisker summary for one box.
+    - label_distribution_stats: Violin and box stats per label.
+    - get_label_distribution_stats: Cached per-label stats of the
+      shared dashboard dataset.
+"""
+
+import numpy as np
+import streamlit as st
+from sl_utils.logger import log_function_call, streamlit_logger as logger
+from sl_data_for_dashboard.dataset_store import (get_dataset,
+                                                 get_dataset_version,
+                                                 )
+
+KDE_POINTS = 100  # points on each density curve
+KDE_BINS = 512  # histogram bins the density is smoothed from
+
+
+def _clean(values, weights):
+    values = np.asarray(values, dtype="float64")
+    if weights is None:
+        weights = np.ones_like(values)
+    weights = np.asarray(weights, dtype="float64")
+    keep = np.isfinite(values) & np.isfinite(weights) & (weights > 0)
+    return values[keep], weights[keep]
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+    Return the weighted quantiles of values.
+
+    Each value's weight is spread around its position in the sorted
+    order, which matches numpy's linear quantiles when all weights are 1.
+    """
+    values, weights = _clean(values, weights)
+    if not len(values):
+        return np.full(len(quantiles), np.nan)
+    order = np.argsort(values, kind="stable")
+    values, weights = values[order], weights[order]
+    cumulative = np.cumsum(weights) - 0.5 * weights
+    cumulative /= weights.sum()
+    return np.interp(quantiles, cumulative, values)
+
+
+def _weighted_density(values, weights, coords):
+    """Gaussian KDE of the weighted values evaluated at coords.
+
+    Values are binned into a weighted histogram first and the histogram
+    is smoothed with a sampled Gaussian kernel, so the cost does not grow
+    with the number of rows. Bandwidth follows Scott's rule using the
+    effective sample size of the weights.
+    """
+    total = weights.sum()
+    mean = np.average(values, weights=weights)
+    std = np.sqrt(np.average((values - mean) ** 2, weights=weights))
+    n_effective = total ** 2 / np.sum(weights ** 2)
+    bandwidth = std * n_effective ** (-1 / 5)
+    if not bandwidth > 0:
+        # every value is the same, draw a flat sliver
+        return np.ones_like(coords)
+
+    low, high = values.min(), values.max()
+    counts, edges = np.histogram(values, bins=KDE_BINS,
+                                 range=(low, high), weights=weights)
+    centres = (edges[:-1] + edges[1:]) / 2
+    step = edges[1] - edges[0]
+    half_width = min(int(np.ceil(4 * bandwidth / step)), KDE_BINS)
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    smoothed = np.convolve(counts, kernel)[half_width:half_width + KDE_BINS]
+    density = np.interp(coords, centres, smoothed)
+    return density / (total * bandwidth * np.sqrt(2 * np.pi))
+
+
+def weighted_violin_stats(values, weights=None, log_scale=False,
+                          points=KDE_POINTS):
+    """
+    Return the stats dict Axes.violin expects for one violin.
+
+    With log_scale the density is estimated on log10 of the (positive)
+    values, so violins drawn on a log axis keep their shape.
+    """
+    values, weights = _clean(values, weights)
+    if log_scale:
+        keep = values > 0
+        values, weights = values[keep], weights[keep]
+    if not len(values):
+        return None
+
+    fit_values = np.log10(values) if log_scale else values
+    coords = np.linspace(fit_values.min(), fit_values.max(), points)
+    density = _weighted_density(fit_values, weights, coords)
+    if log_scale:
+        coords = 10 ** coords
+
+    q1, median, q3 = weighted_quantiles(values, weights, [0.25, 0.5, 0.75])
+    return {
+        "coords": coords,
+        "vals": density,
+        "mean": np.average(values, weights=weights),
+        "median": median,
+        "min": values.min(),
+        "max": values.max(),
+        "quantiles": np.array([q1, q3]),
+    }
+
+
+def weighted_box_stats(values, weights=None, label=None, whis=1.5):
+    """
+    Return the stats dict Axes.bxp expects for one box.
+
+    Whiskers reach the furthest values within whis * IQR of the box.
+    Values beyond them are returned as fliers.
+    """
+    values, weights = _clean(values, weights)
+    if not len(values):
+        return None
+    q1, median, q3 = weighted_quantiles(values, weights, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = (values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)
+    return {
+        "label": label,
+        "mean": np.average(values, weights=weights),
+        "med": median,
+        "q1": q1,
+        "q3": q3,
+        "whislo": values[inside].min(),
+        "whishi": values[inside].max(),
+        "fliers": np.unique(values[~inside]),
+    }
+
+
+def label_distribution_stats(df, columns, label_col="label",
+                             weight_col="article_count", log_columns=()):
+    """
+    Compute violin and box stats for each column, split by label.
+
+    Returns:
+        dict: {column: {"labels": [...], "violin": [...], "box": [...]}}
+        with one list entry per label value, in ascending label order.
+    """
+    weights = df[weight_col].to_numpy() if weight_col else None
+    labels = np.sort(df[label_col].dropna().unique())
+    label_values = df[label_col].to_numpy()
+    stats = {}
+    for column in columns:
+        values = df[column].to_numpy()
+        entry = {"labels": list(labels), "violin": [], "box": []}
+        for label in labels:
+            rows = label_values == label
+            label_weights = weights[rows] if weights is not None else None
+            entry["violin"].append(weighted_violin_stats(
+                values[rows], label_weights,
+                log_scale=column in log_columns))
+            entry["box"].append(weighted_box_stats(
+                values[rows], label_weights, label=label))
+        stats[column] = entry
+    return stats
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _shared_label_stats(version, columns, log_columns):
+    return label_distribution_stats(get_dataset("data_clean"), columns,
+                                    log_columns=log_columns)
+
+
+@log_function_call(logger)
+def get_label_distribution_stats(columns, log_columns=()):
+    """
+    Return label_distribution_stats for the shared dashboard dataset,
+    computed once per dataset version.
+    """
+    return _shared_label_stats(get_dataset_version("data_clean"),
+                               tuple(columns), tuple(log_columns))
+
+
+# Path: sl_components/weighted_stats.py
+# end of file
@@ -14,72 +14,244 @@ and process data for the dashboard.
     - dashboarddata: Loads the data required for the dashboard visualization.
     - wordcountdata: Loads the data required for the wordcloud visualization.
 
+    Parsed frames are cached as Parquet next to their source file
+    (see config.DATA_CACHE) and reused while the source's mtime and
+    size are unchanged, so later cold starts skip CSV parsing.
+
     Returns:
         _type_: _description_
     """
 
+import hashlib
 import pandas as pd
 from sl_utils.logger import log_function_call, datapipeline_logger as logger
+from sl_components.filters import temporal_index_name
+import config
 import os
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # without pyarrow the loaders parse the CSVs every time
+    pa = None
+    pq = None
 
-@log_function_call(logger)
-def mapdata():
-    # Check if articlesformap.csv exists
-    file_path = "sl_data_for_dashboard//articlesformap.csv"
-    if os.path.exists(file_path):
-        logger.debug(f"{file_path} exists. Loading the file.")
-        articles = pd.read_csv(file_path)
-    else:
-        logger.debug(f"{file_path} does not exist.")
-        return RuntimeError(f"{file_path} does not exist.")
+MAP_SOURCE = "sl_data_for_dashboard//articlesformap.csv"
+DASHBOARD_SOURCE = "sl_data_for_dashboard//dashboard_data.zip"
 
-    return articles
 
+def source_signature(file_path, schema_name=None):
+    """
+    Return the signature that keys the columnar cache: the source's
+    mtime and size, plus a hash of its schema so schema edits in
+    config.py invalidate the cache too.
+    """
+    stat = os.stat(file_path)
+    signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+    if schema_name:
+        schema = repr(config.DATA_SCHEMAS[schema_name]).encode()
+        signature += f":{hashlib.md5(schema).hexdigest()}"
+    return signature
 
-@log_function_call(logger)
-def dashboarddata():
-    df = pd.read_csv(
-        "sl_data_for_dashboard//dashboard_data.zip",
-        compression='zip',
-        low_memory=False
-    )
 
-    # Rename columns for consistency
-    df = df.rename(columns={
-        "title_polarity_value": "title_polarity",
-        "article_polarity_value": "article_polarity",
-        "title_subjectivity_value": "title_subjectivity",
-        "article_subjectivity_value": "article_subjectivity",
-        "overall_polarity_value": "overall_polarity",
-        "overall_subjectivity_value": "overall_subjectivity",
-        "contradiction_polarity_value": "contradiction_polarity",
-        "contradiction_subjectivity_value": "contradiction_subjectivity",
-        "polarity_variations_value": "polarity_variations",
-        "subjectivity_variations_value": "subjectivity_variations",
-        "count_of_locations": "unique_location_count",
-        "text_length_value": "text_length",
-        "article_id": "article_count"
-    })
+def cache_path(file_path, suffix=None):
+    """
+    Return the path of the columnar cache written next to file_path.
+    suffix replaces config.DATA_CACHE["suffix"] for other frames derived
+    from the same source, e.g. a lookup index.
+    """
+    return f"{file_path}{suffix or config.DATA_CACHE['suffix']}"
 
+
+def _cache_enabled():
+    return pq is not None and config.DATA_CACHE.get("enabled", False)
+
+
+def read_columnar_cache(file_path, schema_name=None, suffix=None):
+    """
+    Load the cached frame for file_path.
+
+    Returns None when there is no cache, it cannot be read, or it was
+    built from a different version of the source file.
+    """
+    if not _cache_enabled():
+        return None
+    path = cache_path(file_path, suffix)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pq.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Could not read cache {path}: {e}")
+        return None
+
+    metadata = table.schema.metadata or {}
+    cached_signature = metadata.get(
+        config.DATA_CACHE["signature_key"].encode(), b"").decode()
+    if cached_signature != source_signature(file_path, schema_name):
+        logger.info(f"{path} is stale. Rebuilding from {file_path}.")
+        return None
+    return table.to_pandas()
+
+
+def write_columnar_cache(df, file_path, schema_name=None, suffix=None):
+    """Write df as the columnar cache for file_path, stamped with its
+    source signature. Failures are logged and otherwise ignored."""
+    if not _cache_enabled():
+        return
+    path = cache_path(file_path, suffix)
+    # write to a temp file first so a crash never leaves a partial cache
+    tmp_path = f"{path}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        metadata = dict(table.schema.metadata or {})
+        metadata[config.DATA_CACHE["signature_key"].encode()] = (
+            source_signature(file_path, schema_name).encode())
+        table = table.replace_schema_metadata(metadata)
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote columnar cache {path}")
+    except (OSError, pa.ArrowException, ValueError, TypeError) as e:
+        # e.g. an object column mixing types Arrow cannot convert
+        logger.warning(f"Could not write cache {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_with_cache(file_path, builder, schema_name=None, suffix=None):
+    """
+    Return the frame for file_path, from the columnar cache when it is
+    current, otherwise by calling builder(file_path), applying the
+    named schema and caching the result (at cache_path(file_path,
+    suffix)).
+    """
+    df = read_columnar_cache(file_path, schema_name, suffix)
+    if df is not None:
+        logger.debug(f"Loaded {file_path} from columnar cache.")
+        return df
+    df = builder(file_path)
+    if schema_name:
+        df = apply_schema(df, schema_name)
+    write_columnar_cache(df, file_path, schema_name, suffix)
+    return df
+
+
+def _derive_month_num(df):
     # Map full month names to numbers
     month_map = {
         'January': 1, 'February': 2, 'March': 3, 'April': 4,
         'May': 5, 'June': 6, 'July': 7, 'August': 8,
         'September': 9, 'October': 10, 'November': 11, 'December': 12
     }
-
     # Map, then fill any unrecognized or missing months with April (4)
-    df["month_num"] = df["month"].map(month_map).fillna(4).astype(int)
+    return df["month"].map(month_map).fillna(4).astype(int)
+
 
+def _derive_date_clean(df):
     # Format the date_clean field
-    df["date_clean"] = pd.to_datetime(
+    return pd.to_datetime(
         df["year"].astype(int).astype(str) + "-" +
         df["month_num"].astype(str).str.zfill(2) + "-01"
     )
 
+
+# derived column name -> function building it from the renamed frame
+DERIVED_COLUMNS = {
+    "month_num": _derive_month_num,
+    "date_clean": _derive_date_clean,
+}
+
+
+@log_function_call(logger)
+def apply_schema(df, schema_name):
+    """
+    Apply a config.DATA_SCHEMAS entry to df: rename columns, build the
+    derived columns, then convert categoricals, datetimes and narrowed
+    numeric dtypes in a single astype call. Logs the bytes saved.
+
+    If the schema names a temporal_index column, rows are sorted by it
+    and a DatetimeIndex built from it (named temporal_index_name(column))
+    lets filter_by_date slice date ranges with binary searches.
+
+    Parameters:
+        df (pd.DataFrame): Frame as parsed from the source file.
+        schema_name (str): Key into config.DATA_SCHEMAS.
+
+    Returns:
+        pd.DataFrame: The converted frame.
+    """
+    schema = config.DATA_SCHEMAS[schema_name]
+    bytes_before = df.memory_usage(deep=True).sum()
+
+    df = df.rename(columns=schema.get("renames", {}))
+    for column in schema.get("derived", []):
+        df[column] = DERIVED_COLUMNS[column](df)
+
+    dtype_map = {}
+    prefixes = tuple(schema.get("categorical_prefixes", []))
+    for column in df.columns:
+        if column in schema.get("categoricals", []) or (
+                prefixes and column.startswith(prefixes)):
+            dtype_map[column] = "category"
+    for column in schema.get("datetimes", []):
+        if column in df.columns:
+            dtype_map[column] = "datetime64[ns]"
+    for column, dtype in schema.get("dtypes", {}).items():
+        if column not in df.columns:
+            logger.debug(f"{schema_name}: no column {column}, skipping.")
+            continue
+        if dtype.startswith("int") and df[column].isna().any():
+            # integer dtypes cannot hold NaN, keep the parsed dtype
+            logger.warning(f"{schema_name}: {column} has missing values,"
+                           f" not converting to {dtype}.")
+            continue
+        dtype_map[column] = dtype
+    df = df.astype(dtype_map)
+
+    date_column = schema.get("temporal_index")
+    if date_column:
+        df = df.sort_values(date_column, kind="stable")
+        df.index = pd.DatetimeIndex(df[date_column],
+                                    name=temporal_index_name(date_column))
+
+    bytes_after = df.memory_usage(deep=True).sum()
+    logger.info(f"{schema_name} schema applied: {bytes_before:,} ->"
+                f" {bytes_after:,} bytes"
+                f" ({bytes_before - bytes_after:,} saved)")
     return df
 
 
+@log_function_call(logger)
+def mapdata():
+    # Check if articlesformap.csv exists
+    file_path = MAP_SOURCE
+    if os.path.exists(file_path):
+        logger.debug(f"{file_path} exists. Loading the file.")
+        articles = load_with_cache(file_path, _build_mapdata, "map")
+    else:
+        logger.debug(f"{file_path} does not exist.")
+        return RuntimeError(f"{file_path} does not exist.")
+
+    return articles
+
+
+def _build_mapdata(file_path):
+    return pd.read_csv(file_path)
+
+
+@log_function_call(logger)
+def dashboarddata():
+    return load_with_cache(DASHBOARD_SOURCE, _build_dashboarddata,
+                           "dashboard")
+
+
+def _build_dashboarddata(file_path):
+    return pd.read_csv(
+        file_path,
+        compression='zip',
+        low_memory=False
+    )
+
+
 # Path: f_dashboard/data_prep.py
 # end of file
@@ -0,0 +1,68 @@
+"""
+Description: Process-wide store for the dashboard datasets.
+
+    Each dataset is loaded once per server process and per dataset
+    version (the source signature used by the columnar cache) and is
+    shared by every session. Sessions receive shallow views of the shared
+    frame rather than their own copies.
+
+    Write protection comes from pandas copy-on-write, which the app
+    switches on at start-up (see Real_Or_Dubious_News.py): a view handed
+    to a session shares the shared frame's memory until the session
+    writes to it, at which point only the touched columns are copied into
+    the view. The shared frame itself is never modified.
+
+    Functions:
+    - get_dataset: Returns a read-only view of a named dataset.
+    - get_dataset_version: Returns the version key of a named dataset.
+"""
+
+import streamlit as st
+from sl_utils.logger import log_function_call, streamlit_logger as logger
+from sl_data_for_dashboard.data_load import (dashboarddata,
+                                             mapdata,
+                                             source_signature,
+                                             DASHBOARD_SOURCE,
+                                             MAP_SOURCE,
+                                             )
+
+# session_state key -> (loader, source file, schema name)
+DATASETS = {
+    "data_clean": (dashboarddata, DASHBOARD_SOURCE, "dashboard"),
+    "data_for_map": (mapdata, MAP_SOURCE, "map"),
+}
+
+
+def get_dataset_version(name):
+    """Return the version key of a dataset: its source signature."""
+    _, source, schema_name = DATASETS[name]
+    return source_signature(source, schema_name)
+
+
+@st.cache_resource(max_entries=2 * len(DATASETS), show_spinner=False)
+def _load_shared_dataset(name, version):
+    # cache_resource hands every caller the same object, so this frame
+    # is shared by all sessions and must only ever be read
+    loader = DATASETS[name][0]
+    logger.info(f"Loading shared dataset {name} ({version})")
+    return loader()
+
+
+@log_function_call(logger)
+def get_dataset(name):
+    """
+    Return a read-only view of a shared dataset.
+
+    Parameters:
+        name (str): Dataset name, one of DATASETS.
+
+    Returns:
+        pd.DataFrame: Shallow view of the shared frame. Writes to it
+        copy the touched data first and never reach the shared frame.
+    """
+    shared = _load_shared_dataset(name, get_dataset_version(name))
+    return shared.copy(deep=False)
+
+
+# Path: sl_data_for_dashboard/dataset_store.py
+# end of file
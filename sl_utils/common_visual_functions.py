@@ -1,10 +1,21 @@
+import threading
+from collections import OrderedDict
 import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sl_utils.logger import log_function_call, streamlit_logger
 import numpy as np
 import pandas as pd
-from sl_components.filters import filter_by_date
+from sl_components.filters import filter_by_date, date_bounds
+from sl_components.cube import get_cube, rollup
+from sl_data_for_dashboard.dataset_store import get_dataset_version
+from sl_components.weighted_stats import label_distribution_stats
+from sl_utils.figure_cache import figure_key, show_figure
+from sl_components.binning import (aggregate_label_grid,
+                                   bin_weighted_points,
+                                   DEFAULT_GRID_SIZE,
+                                   DEFAULT_MAX_MARKERS,
+                                   )
 from nltk.corpus import stopwords
 from wordcloud import WordCloud
 import plotly.express as px
@@ -41,13 +52,37 @@ def get_dataset_or_error(required_columns=None, dataflag=None):
         return None
 
 
+def get_rollup_or_error(group_by, df=None):
+    """
+    Return the article_count roll-up over group_by, or None (with an
+    error shown) if the data lacks those columns.
+
+    Without df the roll-up comes from the shared cube, which always
+    covers the whole dashboard dataset. Pass df (e.g. a date-filtered
+    frame) to roll up that frame instead.
+    """
+    if df is None:
+        cube = get_cube()
+        missing = [col for col in group_by if col not in cube.columns]
+        if missing:
+            st.error(f"Dataset missing required columns: {', '.join(missing)}")
+            return None
+        return rollup(group_by)
+
+    missing = [col for col in list(group_by) + ["article_count"]
+               if col not in df.columns]
+    if missing:
+        st.error(f"Dataset missing required columns: {', '.join(missing)}")
+        return None
+    return (df.groupby(list(group_by), observed=True)
+            .agg(article_count=("article_count", "sum"))
+            .reset_index())
+
 
 def apply_date_filter(df,
                       date_col="date_clean",
                       pageref_label=""):
-    df[date_col] = pd.to_datetime(df[date_col])
-    min_date = df[date_col].min().date()
-    max_date = df[date_col].max().date()
+    min_date, max_date = (bound.date() for bound in date_bounds(df, date_col))
 
     show_slider = st.checkbox("Show Date Slider",
                               value=False,
@@ -80,10 +115,12 @@ def select_display_type(key):
 
 
 def prepare_counts(df, group_by, display_type):
-    counts = df.groupby(group_by).agg(article_count=("article_count", "sum")).reset_index()
+    # df is normally a cube roll-up (see get_rollup_or_error), so this
+    # groupby only touches one row per group
+    counts = df.groupby(group_by, observed=True).agg(article_count=("article_count", "sum")).reset_index()
 
     if display_type == "Percentage":
-        counts["percentage"] = counts["article_count"] / counts.groupby(group_by[0])["article_count"].transform("sum") * 100
+        counts["percentage"] = counts["article_count"] / counts.groupby(group_by[0], observed=True)["article_count"].transform("sum") * 100
         return counts, "percentage", "Percentage of Articles"
 
     return counts, "article_count", "Sum of Article Counts"
@@ -93,6 +130,14 @@ def prepare_counts(df, group_by, display_type):
 
 def plot_bar(data, x, y, hue, title, xlabel,
              ylabel, order=None, rotate_xticks=True):
+    key = figure_key("plot_bar", data, x=x, y=y, hue=hue, title=title,
+                     xlabel=xlabel, ylabel=ylabel, order=order,
+                     rotate_xticks=rotate_xticks)
+    show_figure(key, lambda: _draw_bar(data, x, y, hue, title, xlabel,
+                                       ylabel, order, rotate_xticks))
+
+
+def _draw_bar(data, x, y, hue, title, xlabel, ylabel, order, rotate_xticks):
     my_pal = {0: "green", 1: "red"}
     fig, ax = plt.subplots(figsize=(6, 3))
     sns.barplot(data=data, x=x, y=y, hue=hue,
@@ -107,11 +152,18 @@ def plot_bar(data, x, y, hue, title, xlabel,
     ax.legend(handles=handles, title="Label",
               labels=["Dubious (0)", "Real (1)"], fontsize=8)
     if rotate_xticks:
-        plt.xticks(rotation=45)
-    st.pyplot(fig)
+        ax.tick_params(axis='x', labelrotation=45)
+    return fig
 
 
 def plot_line(data, x, y, hue, title, xlabel, ylabel):
+    key = figure_key("plot_line", data, x=x, y=y, hue=hue, title=title,
+                     xlabel=xlabel, ylabel=ylabel)
+    show_figure(key, lambda: _draw_line(data, x, y, hue, title,
+                                        xlabel, ylabel))
+
+
+def _draw_line(data, x, y, hue, title, xlabel, ylabel):
     my_pal = {0: "green", 1: "red"}
     fig, ax = plt.subplots(figsize=(12, 3))
     sns.lineplot(data=data, x=x, y=y, hue=hue,
@@ -122,17 +174,32 @@ def plot_line(data, x, y, hue, title, xlabel, ylabel):
     handles, _ = ax.get_legend_handles_labels()
     ax.legend(handles=handles, title="Label",
               labels=["Dubious (0)", "Real (1)"], fontsize=10)
-    plt.xticks(rotation=45)
-    st.pyplot(fig)
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
 
 
 def plot_scatter(df, x_col, y_col, hue_col,
-                 title, xlabel, ylabel, palette=None):
+                 title, xlabel, ylabel, palette=None, cache_key=None):
+    """
+    Scatter plot of df. cache_key identifies the plotted data in the
+    figure cache (e.g. dataset version and date range); without it the
+    columns used are fingerprinted.
+    """
     if df.empty:
         st.warning("No data available for the selected date range.")
         return
 
     palette = palette or {0: "green", 1: "red"}
+    data_key = (cache_key if cache_key is not None
+                else df[[x_col, y_col, hue_col]])
+    key = figure_key("plot_scatter", data_key, x_col=x_col, y_col=y_col,
+                     hue_col=hue_col, title=title, xlabel=xlabel,
+                     ylabel=ylabel, palette=palette)
+    show_figure(key, lambda: _draw_scatter(df, x_col, y_col, hue_col, title,
+                                           xlabel, ylabel, palette))
+
+
+def _draw_scatter(df, x_col, y_col, hue_col, title, xlabel, ylabel, palette):
     fig, ax = plt.subplots(figsize=(3, 3))
     sns.scatterplot(data=df, x=x_col, y=y_col, hue=hue_col,
                     palette=palette, alpha=0.7, ax=ax)
@@ -140,13 +207,28 @@ def plot_scatter(df, x_col, y_col, hue_col,
     ax.set_xlabel(xlabel, fontsize=8)
     ax.set_ylabel(ylabel, fontsize=8)
     ax.legend(title="Label", labels=["Dubious (0)", "Real (1)"], fontsize=10)
-    st.pyplot(fig)
+    return fig
 
 
-def plot_violin(ax, df, x, y, title, xlabel,
+def plot_violin(ax, stats, title, xlabel,
                 ylabel, log_scale=False, color_map=None):
-    sns.violinplot(data=df, x=x, y=y, ax=ax,
-                   hue=x, legend=False, palette=color_map)
+    """
+    Draw one violin per label from precomputed stats, an entry of
+    weighted_stats.label_distribution_stats.
+    """
+    positions = [i for i, s in enumerate(stats["violin"]) if s is not None]
+    violins = [s for s in stats["violin"] if s is not None]
+    if violins:
+        parts = ax.violin(violins, positions=positions, widths=0.8,
+                          showmedians=True, showextrema=False)
+        for position, body in zip(positions, parts["bodies"]):
+            label = stats["labels"][position]
+            if color_map:
+                body.set_facecolor(color_map.get(label, "grey"))
+            body.set_alpha(0.7)
+        # inner box: interquartile range
+        for position, violin in zip(positions, violins):
+            ax.vlines(position, *violin["quantiles"], color="black", lw=3)
     ax.set_title(title, fontsize=8)
     ax.set_xticks([0, 1])
     ax.set_xticklabels(["Dubious (0)", "Real (1)"])
@@ -158,17 +240,92 @@ def plot_violin(ax, df, x, y, title, xlabel,
     ax.tick_params(axis='y', labelsize=6)
 
 
-def plot_boxplot(df, x_col, y_col, title, xlabel, ylabel, palette=None):
-    fig, ax = plt.subplots(figsize=(3, 3))
+def plot_boxplot(df, x_col, y_col, title, xlabel, ylabel, palette=None,
+                 weight_col=None, stats=None, cache_key=None):
+    """
+    Box plot of y_col per x_col label, drawn from precomputed box stats.
+    stats defaults to label_distribution_stats of df (weighted by
+    weight_col when given). cache_key identifies df in the figure cache;
+    without it the stats are fingerprinted.
+    """
     palette = palette or {1: "green", 0: "red"}
-    sns.boxplot(data=df, x=x_col, y=y_col, palette=palette, ax=ax)
+    params = dict(x_col=x_col, y_col=y_col, title=title, xlabel=xlabel,
+                  ylabel=ylabel, palette=palette, weight_col=weight_col)
+    if cache_key is None:
+        if stats is None:
+            stats = label_distribution_stats(df, [y_col], label_col=x_col,
+                                             weight_col=weight_col)[y_col]
+        key = figure_key("plot_boxplot", stats["box"], **params)
+    else:
+        key = figure_key("plot_boxplot", cache_key, **params)
+
+    def draw():
+        box_stats = stats
+        if box_stats is None:
+            box_stats = label_distribution_stats(
+                df, [y_col], label_col=x_col, weight_col=weight_col)[y_col]
+        return _draw_boxplot(box_stats, title, xlabel, ylabel, palette)
+
+    show_figure(key, draw)
+
+
+def _draw_boxplot(stats, title, xlabel, ylabel, palette):
+    fig, ax = plt.subplots(figsize=(3, 3))
+    boxes = [box for box in stats["box"] if box is not None]
+    artists = ax.bxp(boxes, positions=range(len(boxes)), widths=0.6,
+                     patch_artist=True, showfliers=True)
+    for box, patch in zip(boxes, artists["boxes"]):
+        patch.set_facecolor(palette.get(box["label"], "grey"))
     ax.set_title(title, fontsize=10)
     ax.set_xlabel(xlabel, fontsize=8)
     ax.set_ylabel(ylabel, fontsize=8)
     ax.set_xticklabels(["Dubious (0)", "Real (1)"])
     ax.tick_params(axis='x', labelsize=8)
     ax.tick_params(axis='y', labelsize=8)
-    st.pyplot(fig)
+    return fig
+
+
+MAX_CACHED_GRIDS = 32  # aggregated hexbin grids kept per process
+_label_grids = OrderedDict()
+_label_grids_lock = threading.Lock()
+
+
+def date_filtered_cache_key(df, chart_name, date_col="date_clean"):
+    """
+    Cache key for data cut from the shared dataset by apply_date_filter:
+    dataset version, chart and the dates actually present in df.
+    """
+    return (get_dataset_version("data_clean"), chart_name,
+            *date_bounds(df, date_col))
+
+
+def get_label_grid(df, x_col, y_col, label_col, grid_size=30,
+                   threshold=None, marginal_bins=30, xlim=None, ylim=None,
+                   cache_key=None):
+    """
+    Return aggregate_label_grid for the given columns of df, reusing the
+    previous result when cache_key (see date_filtered_cache_key) and the
+    grid settings match.
+    """
+    key = None
+    if cache_key is not None:
+        key = (cache_key, x_col, y_col, label_col, grid_size, threshold,
+               marginal_bins, xlim, ylim)
+        with _label_grids_lock:
+            if key in _label_grids:
+                _label_grids.move_to_end(key)
+                return _label_grids[key]
+
+    grid = aggregate_label_grid(df[x_col], df[y_col], df[label_col],
+                                grid_size=grid_size, x_range=xlim,
+                                y_range=ylim, marginal_bins=marginal_bins,
+                                threshold=threshold)
+    if key is not None:
+        with _label_grids_lock:
+            _label_grids[key] = grid
+            while len(_label_grids) > MAX_CACHED_GRIDS:
+                _label_grids.popitem(last=False)
+    return grid
 
 
 def plot_hexbin_grid(df,
@@ -183,87 +340,101 @@ def plot_hexbin_grid(df,
                      ylim=None,
                      threshold=None,
                      marginal_bins=30,
-                     grid_size=30):
-    if threshold:
-        df.loc[df[x_col].abs() < threshold, x_col] = None
-        df.loc[df[y_col].abs() < threshold, y_col] = None
-    df = df.dropna(subset=[x_col, y_col])
-    df[label_col] = df[label_col].astype(int)
-
+                     grid_size=30,
+                     cache_key=None):
+    # Counts, mean label per cell and marginals in one pass; df is
+    # only read, points under the threshold are masked out, not written
+    grid = get_label_grid(df, x_col, y_col, label_col,
+                          grid_size=grid_size, threshold=threshold,
+                          marginal_bins=marginal_bins, xlim=xlim,
+                          ylim=ylim, cache_key=cache_key)
+    # the grid already summarises everything the figure shows
+    key = figure_key("plot_hexbin_grid", grid["counts"],
+                     grid["mean_label"], grid["x_edges"], grid["y_edges"],
+                     title=title, xlabel=xlabel, ylabel=ylabel, cmap=cmap,
+                     xlim=xlim, ylim=ylim, marginal_bins=marginal_bins)
+    show_figure(key, lambda: _draw_hexbin_grid(grid, title, xlabel, ylabel,
+                                               cmap, xlim, ylim))
+
+
+def _draw_hexbin_grid(grid, title, xlabel, ylabel, cmap, xlim, ylim):
     fig = plt.figure(figsize=(8, 8))
-    grid = sns.jointplot(data=df, x=x_col, y=y_col, kind="hex",
-                         cmap=cmap, gridsize=grid_size, marginal_ticks=True)
-
-    hexbin = grid.ax_joint.hexbin(df[x_col],
-                                  df[y_col],
-                                  C=df[label_col],
-                                  reduce_C_function=np.mean,
-                                  gridsize=grid_size,
-                                  cmap=cmap)
-
-    cbar = fig.colorbar(hexbin, ax=grid.ax_joint)
+    layout = fig.add_gridspec(2, 3, width_ratios=(5, 1, 0.25),
+                              height_ratios=(1, 5),
+                              wspace=0.05, hspace=0.05)
+    ax_joint = fig.add_subplot(layout[1, 0])
+    ax_marg_x = fig.add_subplot(layout[0, 0], sharex=ax_joint)
+    ax_marg_y = fig.add_subplot(layout[1, 1], sharey=ax_joint)
+
+    mesh = ax_joint.pcolormesh(grid["x_edges"], grid["y_edges"],
+                               grid["mean_label"].T, cmap=cmap,
+                               vmin=0, vmax=1)
+    cbar = fig.colorbar(mesh, cax=fig.add_subplot(layout[1, 2]))
     cbar.set_label("Proportion of Real Articles", fontsize=10)
 
-    sns.histplot(df[x_col], bins=marginal_bins,
-                 ax=grid.ax_marg_x, color="gray", kde=True)
-    sns.histplot(df[y_col], bins=marginal_bins,
-                 ax=grid.ax_marg_y, color="gray", kde=True)
+    ax_marg_x.stairs(grid["x_hist"], grid["x_hist_edges"],
+                     fill=True, color="gray")
+    ax_marg_y.stairs(grid["y_hist"], grid["y_hist_edges"],
+                     fill=True, color="gray", orientation="horizontal")
+    ax_marg_x.tick_params(axis="x", labelbottom=False)
+    ax_marg_y.tick_params(axis="y", labelleft=False)
 
-    grid.figure.suptitle(title, fontsize=12)
-    grid.figure.tight_layout(rect=[0, 0, 1, 0.95])  # Adjust layout to make space for the title
-    grid.ax_joint.set_xlabel(xlabel, fontsize=10)
-    grid.ax_joint.set_ylabel(ylabel, fontsize=10)
+    fig.suptitle(title, fontsize=12)
+    ax_joint.set_xlabel(xlabel, fontsize=10)
+    ax_joint.set_ylabel(ylabel, fontsize=10)
 
     if xlim:
-        grid.ax_joint.set_xlim(*xlim)
+        ax_joint.set_xlim(*xlim)
     if ylim:
-        grid.ax_joint.set_ylim(*ylim)
+        ax_joint.set_ylim(*ylim)
 
-    st.pyplot(grid.fig)
+    return fig
 
 
 def plotly_weighted_scatter(df, x, y, size, label_col,
                             title, xlabel, ylabel,
-                            mode="ratio", max_size=40):
+                            mode="ratio", max_size=40,
+                            grid_size=DEFAULT_GRID_SIZE,
+                            max_markers=DEFAULT_MAX_MARKERS):
     if df.empty:
         st.warning("No data available to display.")
         return
 
-    df = df.copy()
+    # Aggregate onto a grid_size x grid_size grid so the number of
+    # markers sent to the browser is bounded (see sl_components.binning)
+    binned = bin_weighted_points(df[x], df[y], df[size], df[label_col],
+                                 grid_size=grid_size,
+                                 max_markers=max_markers,
+                                 split_labels=(mode == "binary"))
+    binned = binned.rename(columns={"x": x, "y": y})
 
     if mode == "binary":
-        df[label_col] = df[label_col].astype(str)
-        df = df.sort_values(by=label_col)
+        binned["label"] = binned["label"].astype(int).astype(str)
+        binned = binned.sort_values(by="label")
 
         fig = px.scatter(
-            df,
+            binned,
             x=x,
             y=y,
-            size=size,
-            color=label_col,
+            size="article_count",
+            color="label",
             color_discrete_map={"0": "red", "1": "green"},
             size_max=max_size,
             opacity=0.7,
             title=title,
-            hover_data={x: True, y: True, size: True, label_col: True}
+            hover_data={x: True, y: True, "article_count": True,
+                        "label": True}
         )
 
     elif mode == "ratio":
-        # Pivot the data to combine label 0 and 1 counts at each x/y point
-        grouped = df.groupby([x, y, label_col])[size].sum().unstack(fill_value=0).reset_index()
-        grouped.columns.name = None  # remove MultiIndex name
-
-        grouped["real_ratio"] = grouped.get(1, 0) / (grouped.get(1, 0) + grouped.get(0, 0))
-        grouped["real_ratio"] = grouped["real_ratio"].fillna(0.5)
-        grouped["article_count"] = grouped.get(1, 0) + grouped.get(0, 0)
-
         fig = px.scatter(
-            grouped,
+            binned,
             x=x,
             y=y,
             size="article_count",
             color="real_ratio",
             color_continuous_scale=["red", "purple", "green"],
+            range_color=(0, 1),
             size_max=max_size,
             opacity=0.7,
             title=title,
@@ -0,0 +1,156 @@
+"""
+Description: Process-wide cache of rendered matplotlib figures.
+
+    Streamlit reruns the whole script on every widget change, and each
+    rerun used to build new matplotlib figures that were never closed, so
+    they piled up in pyplot's figure registry. Charts now go through
+    show_figure: the figure is drawn once per key, saved to PNG or SVG
+    bytes and closed straight away. Later reruns with the same key only
+    look the bytes up and send them to the browser.
+
+    Keys combine the plot function, its parameters and either a dataset
+    version (plus filter state) or a fingerprint of the plotted data.
+    The cache holds at most FIGURE_CACHE["max_bytes"] of images and drops
+    the least recently used ones first.
+
+    Functions:
+    - data_fingerprint: Hashable summary of a frame's contents.
+    - figure_key: Builds a cache key from a plot name and parameters.
+    - render_figure: Returns the image bytes for a key, drawing on a miss.
+    - show_figure: Renders through the cache and displays the image.
+    - clear_figure_cache: Empties the cache.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import streamlit as st
+from config import FIGURE_CACHE
+from sl_utils.logger import streamlit_logger as logger
+
+_figures = OrderedDict()
+_figures_lock = threading.Lock()
+_cached_bytes = 0
+
+
+def data_fingerprint(data):
+    """
+    Return a hashable summary of data for use in a figure key.
+
+    DataFrames and Series are hashed row by row with pandas and the row
+    hashes digested in order, so two frames share a fingerprint only
+    with the same columns and the same values in the same row order.
+    Index, Categorical and other array values (e.g. an order= argument)
+    become tuples of their values. Containers are fingerprinted element
+    by element.
+    """
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        hashed = pd.util.hash_pandas_object(data, index=False)
+        columns = (tuple(data.columns) if isinstance(data, pd.DataFrame)
+                   else data.name)
+        return (columns, len(data),
+                hashlib.md5(hashed.to_numpy().tobytes()).hexdigest())
+    if isinstance(data, (pd.Index, pd.api.extensions.ExtensionArray)) or (
+            isinstance(data, np.ndarray) and data.dtype == object):
+        # object arrays hold pointers, so their bytes say nothing
+        values = np.asarray(data)
+        return (type(data).__name__, str(data.dtype), values.shape,
+                tuple(values.ravel().tolist()))
+    if isinstance(data, np.ndarray):
+        return (data.shape, str(data.dtype),
+                hashlib.md5(data.tobytes()).hexdigest())
+    if isinstance(data, dict):
+        return tuple((key, data_fingerprint(value))
+                     for key, value in sorted(data.items(), key=repr))
+    if isinstance(data, (list, tuple)):
+        return tuple(data_fingerprint(value) for value in data)
+    return data
+
+
+def figure_key(name, *data, **params):
+    """
+    Build a figure cache key.
+
+    Parameters:
+        name (str): Plot function or chart name.
+        *data: Frames, arrays, version strings or other values the
+            figure depends on; passed through data_fingerprint.
+        **params: Plot parameters (titles, limits, palettes, ...).
+
+    Returns:
+        tuple: Hashable key.
+    """
+    return (name, data_fingerprint(data),
+            data_fingerprint(dict(params)))
+
+
+def _store(key, image):
+    global _cached_bytes
+    with _figures_lock:
+        if key in _figures:
+            return
+        _figures[key] = image
+        _cached_bytes += len(image)
+        while _cached_bytes > FIGURE_CACHE["max_bytes"] and len(_figures) > 1:
+            _, evicted = _figures.popitem(last=False)
+            _cached_bytes -= len(evicted)
+
+
+def render_figure(key, draw, fmt=None):
+    """
+    Return the rendered image for key, calling draw() on a miss.
+
+    Parameters:
+        key (tuple): Key from figure_key.
+        draw (callable): Builds and returns a matplotlib Figure. The
+            figure is always closed once it has been saved.
+        fmt (str, optional): "png" or "svg", defaults to
+            FIGURE_CACHE["format"].
+
+    Returns:
+        bytes: The saved image.
+    """
+    fmt = fmt or FIGURE_CACHE["format"]
+    key = (key, fmt)
+    with _figures_lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+
+    fig = draw()
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=FIGURE_CACHE["dpi"],
+                    bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    image = buffer.getvalue()
+    logger.debug(f"Rendered figure {key[0][0]}: {len(image):,} bytes")
+    _store(key, image)
+    return image
+
+
+def show_figure(key, draw, fmt=None):
+    """Render draw() through the figure cache and display the image."""
+    fmt = fmt or FIGURE_CACHE["format"]
+    image = render_figure(key, draw, fmt)
+    if fmt == "svg":
+        st.image(image.decode("utf-8"))
+    else:
+        st.image(image)
+
+
+def clear_figure_cache():
+    """Drop every cached figure."""
+    global _cached_bytes
+    with _figures_lock:
+        _figures.clear()
+        _cached_bytes = 0
+
+
+# Path: sl_utils/figure_cache.py
+# end of file
@@ -1,10 +1,10 @@
 from sl_utils.logger import streamlit_logger as logger
+import hashlib
 import os
 import time
+import weakref
 import pandas as pd
 import spacy
-from geopy.exc import GeocoderTimedOut
-from flashtext import KeywordProcessor
 from dotenv import load_dotenv
 from pathlib import Path
 from geopy.geocoders import GoogleV3
@@ -12,47 +12,11 @@ from google.cloud import api_keys_v2
 from google.cloud.api_keys_v2 import Key
 from textblob import TextBlob
 import spacy
-
-
-# Function to get geolocation information
-def get_geolocation_info(location):
-    usetimedelay = True
-    try:
-        location_info = geolocator.geocode(location, timeout=10)
-        if location_info:
-            if usetimedelay:
-                time.sleep(1)
-            return {
-                'latitude': location_info.latitude,
-                'longitude': location_info.longitude,
-                'address': location_info.address
-            }
-        else:
-            if usetimedelay:
-                time.sleep(1)
-            return {
-                'latitude': None,
-                'longitude': None,
-                'address': None
-            }
-    except GeocoderTimedOut:
-        print(location)
-        if usetimedelay:
-            time.sleep(1)
-        return {
-            'latitude': None,
-            'longitude': None,
-            'address': None
-        }
-    except Exception as e:
-        print(f"Geocoding error: {e}")
-        if usetimedelay:
-            time.sleep(1)
-        return {
-            'latitude': None,
-            'longitude': None,
-            'address': None
-        }
+from sl_data_for_dashboard.data_load import load_with_cache
+# cached, rate-limited geocoding shared with sl_utils.utils
+from sl_utils.geocoding import get_geolocation_info  # noqa: F401
+from sl_utils import location_extraction
+from sl_utils.location_matcher import get_location_matcher
 
 
 # Function to extract geolocation details
@@ -67,70 +31,138 @@ def extract_geolocation_details(address):
         return None, None, None
 
 
-def extract_locations(text, keyword_processor):
-    """Extracts location names from text using NLP and predefined list."""
+def extract_locations(text, keyword_processor=None):
+    """Extracts location names from text using NLP and predefined list.
+
+    Without a keyword processor the persisted unique-locations matcher
+    is used (see location_matcher). For whole corpora use
+    location_extraction.extract_locations_batch.
+    """
     if keyword_processor is None:
-        logger.info("Keyword processor is not initialized.")
-        keyword_processor = KeywordProcessor()
-
-    logging.debug("Starting location extraction...")
-    # convert text to string
-    text = str(text)
-    # Use NLP to extract geographic locations (GPE entities)
-    doc = nlp(text)
-    nlp_locations = (
-        {ent.text.lower() for ent in doc.ents if ent.label_ == "GPE"})
-    logging.debug(f"NLP Extracted Locations: {nlp_locations}")
-
-    # Fast keyword matching for known locations
-    matched_locations = (
-        set(keyword_processor.extract_keywords(text.lower())))
-    logging.debug("Matched Locations"
-                    f" from Predefined List: {matched_locations}")
-
-    # Return matched locations if found; otherwise,
-    # return NLP-extracted ones
-    final_locations = (
-        matched_locations if matched_locations else nlp_locations)
-    logging.info(f"Final Extracted Locations: {final_locations}")
-
-    return list(final_locations)
-
-def find_location_match(location, worldcities_df):
+        keyword_processor = get_location_matcher()
+    return location_extraction.extract_locations(text, keyword_processor)
+
+
+# Columns searched for a location, in priority order
+LOCATION_SEARCH_COLUMNS = ['city', 'city_ascii', 'country',
+                           'iso2', 'iso3', 'admin_name']
+LOCATION_INDEX_COLUMNS = ['matched_value', 'matched_column',
+                          'latitude', 'longitude', 'country']
+# the persisted index is tied to the search columns it was built with
+LOCATION_INDEX_SUFFIX = ".locidx-{}.parquet".format(
+    hashlib.md5(repr(LOCATION_SEARCH_COLUMNS).encode()).hexdigest()[:8])
+
+# id(worldcities_df) -> (weakref, index); frames are unhashable, so
+# entries are keyed by id and dropped when their frame is collected
+_location_indexes = {}
+
+
+def normalize_locations(values):
+    """Normalize a Series of location strings the way lookups compare
+    them: str, stripped, lower case."""
+    return values.astype(str).str.strip().str.lower()
+
+
+def build_location_index(worldcities_df,
+                         search_columns=LOCATION_SEARCH_COLUMNS):
+    """
+    Build a lookup table from normalized location name to its match.
+
+    For each name the match is the first row of the first column (in
+    search_columns order) holding it, as find_location_match used to
+    find by scanning.
+
+    Returns:
+        pd.DataFrame: Indexed by normalized name, with
+        LOCATION_INDEX_COLUMNS.
+    """
+    candidates = []
+    for col in search_columns:
+        candidates.append(pd.DataFrame({
+            'key': normalize_locations(worldcities_df[col]).to_numpy(),
+            # the source value, with its own type, as the scan returned
+            'matched_value': worldcities_df[col].to_numpy(),
+            'matched_column': col,
+            'latitude': worldcities_df['lat'].to_numpy(),
+            'longitude': worldcities_df['lng'].to_numpy(),
+            'country': worldcities_df['country'].to_numpy(),
+        }))
+    # candidates are in priority order, so the first duplicate wins
+    index = (pd.concat(candidates, ignore_index=True)
+             .drop_duplicates('key', keep='first')
+             .set_index('key'))
+    logger.info(f"Built location index: {len(index):,} names"
+                f" from {len(worldcities_df):,} rows")
+    return index
+
+
+def load_location_index(worldcities_path, reader=None):
+    """
+    Return the location index of the world-cities file, from its
+    persisted copy next to the file when that is current (see
+    data_load.load_with_cache), otherwise built and persisted.
+
+    Parameters:
+        worldcities_path (str): Path of the world-cities CSV or zip.
+        reader (callable, optional): Loads the file into a frame,
+            defaults to pd.read_csv.
+    """
+    reader = reader or pd.read_csv
+    return load_with_cache(
+        worldcities_path,
+        lambda path: build_location_index(reader(path)).reset_index(),
+        suffix=LOCATION_INDEX_SUFFIX).set_index('key')
+
+
+def _index_for(worldcities_df):
+    cached = _location_indexes.get(id(worldcities_df))
+    if cached is not None and cached[0]() is worldcities_df:
+        return cached[1]
+    index = build_location_index(worldcities_df)
+    key = id(worldcities_df)
+    _location_indexes[key] = (weakref.ref(worldcities_df), index)
+    weakref.finalize(worldcities_df, _location_indexes.pop, key, None)
+    return index
+
+
+def match_locations(locations, location_index):
+    """
+    Resolve a whole Series of location strings at once.
+
+    Parameters:
+        locations (pd.Series): Location strings.
+        location_index (pd.DataFrame): From build_location_index or
+            load_location_index.
+
+    Returns:
+        pd.DataFrame: LOCATION_INDEX_COLUMNS aligned with locations,
+        NaN where nothing matched.
+    """
+    matches = location_index.reindex(normalize_locations(locations))
+    matches.index = locations.index
+    return matches
+
+
+def find_location_match(location, worldcities_df, location_index=None):
     """
     Search for a location in multiple columns of worldcities_df.
 
     Args:
         location (str): The location to search for.
         worldcities_df (DataFrame): The dataframe containing city data.
+        location_index (DataFrame, optional): Prebuilt index of
+            worldcities_df; built on first use and reused otherwise.
 
     Returns:
         dict: A dictionary containing the matched value, the column it was
         found in, latitude, longitude, and country.
               Returns None if no match is found.
     """
-    search_columns = ['city', 'city_ascii', 'country',
-                      'iso2', 'iso3', 'admin_name']
+    if location_index is None:
+        location_index = _index_for(worldcities_df)
 
     # Convert input to string and lowercase for case-insensitive comparison
     location = str(location).strip().lower()
-
-    for col in search_columns:
-        # Find rows where the location matches the column
-        match = worldcities_df[worldcities_df[col]
-                               .astype(str)
-                               .str.strip()
-                               .str.lower() == location]
-
-        if not match.empty:
-            # Extract the first match found
-            result = {
-                'matched_value': match.iloc[0][col],
-                'matched_column': col,
-                'latitude': match.iloc[0]['lat'],
-                'longitude': match.iloc[0]['lng'],
-                'country': match.iloc[0]['country']
-            }
-            return result
-
-    return None  # Return None if no match is found
\ No newline at end of file
+    if location not in location_index.index:
+        return None  # Return None if no match is found
+    return location_index.loc[location].to_dict()
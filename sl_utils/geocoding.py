@@ -0,0 +1,322 @@
+"""
+Description: Cached, rate-limited geocoding for the location pipeline.
+
+    Locations are geocoded through a pluggable backend: Google via geopy,
+    or the local world-cities table for offline runs. Every answer,
+    including "not found", is stored in a SQLite cache keyed by the
+    backend's name and the normalized location string, so offline
+    answers never stand in for Google's. Re-running the pipeline therefore only
+    calls the backend for locations it has not seen before, or whose
+    cached answer has expired (see config.GEOCODING for the TTLs).
+
+    Cache misses run on a thread pool. A token bucket shared by the
+    workers keeps the overall request rate within the provider's limit.
+    Transient errors are retried with exponential backoff. Locations
+    that still fail are not cached, so a later run retries them.
+
+    Functions:
+    - normalize_location_key: Cache key of a location string.
+    - backend_name: Name a backend's results are cached under.
+    - GeocodeCache: SQLite store of geocoding results.
+    - TokenBucket: Thread-safe rate limiter.
+    - google_backend: Backend using the Google geocoding API.
+    - worldcities_backend: Offline backend over the world-cities index.
+    - geocode_locations: Geocodes many locations through the cache.
+    - get_geolocation_info: Geocodes one location.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import GEOCODING
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+
+EMPTY_RESULT = {'latitude': None, 'longitude': None, 'address': None}
+
+_default_backend = None
+_default_cache = None
+_defaults_lock = threading.Lock()
+
+
+def normalize_location_key(location):
+    """Return the cache key of a location: lower case, single spaces."""
+    return " ".join(str(location).split()).lower()
+
+
+def backend_name(backend):
+    """Return the name a backend's results are cached under."""
+    return getattr(backend, "backend_name", None) or (
+        f"{backend.__module__}.{backend.__qualname__}")
+
+
+class GeocodeCache:
+    """
+    SQLite cache of geocoding results keyed by backend name and
+    normalized location.
+
+    Misses (the backend found nothing) are stored too, with their own,
+    usually shorter, TTL. Safe to share between threads.
+    """
+
+    def __init__(self, path=None, ttl_days=None, negative_ttl_days=None):
+        self.path = path or GEOCODING["cache_path"]
+        self.ttl = 86400 * (ttl_days if ttl_days is not None
+                            else GEOCODING["ttl_days"])
+        self.negative_ttl = 86400 * (
+            negative_ttl_days if negative_ttl_days is not None
+            else GEOCODING["negative_ttl_days"])
+        self._lock = threading.Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection = sqlite3.connect(self.path,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            columns = [row[1] for row in self._connection.execute(
+                "PRAGMA table_info(geocode)")]
+            if columns and "backend" not in columns:
+                self._connection.execute(
+                    "ALTER TABLE geocode RENAME TO geocode_unkeyed")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " backend TEXT NOT NULL, location TEXT NOT NULL,"
+                " latitude REAL, longitude REAL, address TEXT,"
+                " found INTEGER NOT NULL, fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (backend, location))")
+            if columns and "backend" not in columns:
+                # caches from before the backend key only ever held
+                # answers of the default backend, Google
+                self._connection.execute(
+                    "INSERT INTO geocode SELECT 'google', location,"
+                    " latitude, longitude, address, found, fetched_at"
+                    " FROM geocode_unkeyed")
+                self._connection.execute("DROP TABLE geocode_unkeyed")
+
+    def get_many(self, backend, keys, now=None):
+        """
+        Return {key: result} for the keys with a current cache entry
+        from the named backend. A cached miss is returned as
+        EMPTY_RESULT.
+        """
+        now = now or time.time()
+        keys = list(keys)
+        results = {}
+        with self._lock:
+            # stay below SQLite's limit on query parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    "SELECT location, latitude, longitude, address, found,"
+                    " fetched_at FROM geocode WHERE backend = ? AND"
+                    f" location IN ({','.join('?' * len(chunk))})",
+                    [backend] + chunk).fetchall()
+                for key, lat, lng, address, found, fetched_at in rows:
+                    ttl = self.ttl if found else self.negative_ttl
+                    if now - fetched_at > ttl:
+                        continue
+                    results[key] = ({'latitude': lat, 'longitude': lng,
+                                     'address': address} if found
+                                    else dict(EMPTY_RESULT))
+        return results
+
+    def get(self, backend, key):
+        """Return the cached result of the named backend for key, or None."""
+        return self.get_many(backend, [key]).get(key)
+
+    def put(self, backend, key, result):
+        """
+        Store a result of the named backend; None or an empty address
+        is a miss.
+        """
+        found = bool(result and result.get('address'))
+        result = result if found else EMPTY_RESULT
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO geocode VALUES"
+                " (?, ?, ?, ?, ?, ?, ?)",
+                (backend, key, result['latitude'], result['longitude'],
+                 result['address'], int(found), time.time()))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: on average `rate` acquisitions per
+    second, with bursts of up to `capacity`. Safe to share between
+    threads.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens +
+                                   (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def google_backend(api_key=None, timeout=10):
+    """
+    Return a backend geocoding with the Google API (geopy GoogleV3).
+
+    The backend returns a result dict, None when Google finds nothing,
+    and raises on timeouts and service errors so they can be retried.
+    """
+    from geopy.geocoders import GoogleV3
+
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise RuntimeError("Google API key not found. Please set "
+                           "the GOOGLE_API_KEY environment variable.")
+    geolocator = GoogleV3(api_key=api_key)
+
+    def geocode(location):
+        location_info = geolocator.geocode(location, timeout=timeout)
+        if not location_info:
+            return None
+        return {'latitude': location_info.latitude,
+                'longitude': location_info.longitude,
+                'address': location_info.address}
+
+    geocode.backend_name = "google"
+    return geocode
+
+
+def worldcities_backend(location_index):
+    """
+    Return an offline backend answering from a world-cities location
+    index (see geo_utils.build_location_index / load_location_index).
+    Addresses are "<matched value>, <country>".
+    """
+    def geocode(location):
+        key = str(location).strip().lower()
+        if key not in location_index.index:
+            return None
+        match = location_index.loc[key]
+        return {'latitude': float(match['latitude']),
+                'longitude': float(match['longitude']),
+                'address': f"{match['matched_value']}, {match['country']}"}
+
+    geocode.backend_name = "worldcities"
+    return geocode
+
+
+def _get_default_backend():
+    # built on first use only, as it needs geopy and GOOGLE_API_KEY
+    global _default_backend
+    with _defaults_lock:
+        if _default_backend is None:
+            _default_backend = google_backend()
+        return _default_backend
+
+
+def _get_default_cache():
+    global _default_cache
+    with _defaults_lock:
+        if _default_cache is None:
+            _default_cache = GeocodeCache()
+        return _default_cache
+
+
+def _geocode_with_retries(location, backend, bucket, max_retries, backoff):
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            return True, backend(location)
+        except Exception as e:
+            if attempt == max_retries:
+                logger.warning(f"Geocoding {location!r} failed after"
+                               f" {attempt + 1} attempts: {e}")
+                return False, None
+            delay = backoff * 2 ** attempt
+            logger.debug(f"Geocoding {location!r} failed ({e}),"
+                         f" retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+@log_function_call(logger)
+def geocode_locations(locations, backend=None, cache=None, rate=None,
+                      burst=None, max_workers=None, max_retries=None,
+                      backoff=None):
+    """
+    Geocode many locations, calling the backend only for locations
+    without a current cache entry.
+
+    Parameters:
+        locations (iterable): Location strings; duplicates after
+            normalization are geocoded once.
+        backend (callable, optional): location -> result dict or None.
+            Defaults to google_backend(). Its results are cached under
+            backend_name(backend).
+        cache (GeocodeCache, optional): Defaults to one at
+            GEOCODING["cache_path"].
+        rate, burst, max_workers, max_retries, backoff: Override the
+            GEOCODING settings.
+
+    Returns:
+        dict: {normalized location: {'latitude', 'longitude',
+        'address'}}, with None values when nothing was found.
+    """
+    if backend is None:
+        backend = _get_default_backend()
+    if cache is None:
+        cache = _get_default_cache()
+
+    keys = {}
+    for location in locations:
+        keys.setdefault(normalize_location_key(location), str(location))
+    name = backend_name(backend)
+    results = cache.get_many(name, keys)
+    missing = [key for key in keys if key not in results]
+    logger.info(f"Geocoding {len(keys):,} locations with {name}:"
+                f" {len(results):,} cached, {len(missing):,} to fetch")
+    if not missing:
+        return results
+
+    bucket = TokenBucket(rate or GEOCODING["requests_per_second"],
+                         burst or GEOCODING["burst"])
+    max_retries = (GEOCODING["max_retries"] if max_retries is None
+                   else max_retries)
+    backoff = GEOCODING["backoff_seconds"] if backoff is None else backoff
+
+    def fetch(key):
+        ok, result = _geocode_with_retries(keys[key], backend, bucket,
+                                           max_retries, backoff)
+        if ok:
+            cache.put(name, key, result)
+        return key, (result or dict(EMPTY_RESULT))
+
+    with ThreadPoolExecutor(
+            max_workers=max_workers or GEOCODING["max_workers"]) as pool:
+        results.update(pool.map(fetch, missing))
+    return results
+
+
+def get_geolocation_info(location, backend=None, cache=None):
+    """
+    Return {'latitude', 'longitude', 'address'} for one location,
+    through the geocode cache (values are None when not found).
+    """
+    key = normalize_location_key(location)
+    return geocode_locations([location], backend=backend, cache=cache)[key]
+
+
+# Path: sl_utils/geocoding.py
+# end of file
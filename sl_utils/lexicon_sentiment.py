@@ -0,0 +1,304 @@
+"""
+Description: Lexicon-array sentiment scorer, a fast alternative to
+    TextBlob.
+
+    TextBlob's default analyzer averages the polarity and subjectivity
+    of the words it finds in its lexicon. A preceding modifier ("very
+    good") or negation ("not good") adjusts a word's score, and a
+    following "!" boosts it. This scorer compiles that lexicon into
+    numpy arrays once. It scores a whole batch at a time: the texts are
+    tokenized into one flat array of lexicon ids, the modifier, negation
+    and exclamation rules are applied as shifted-array operations, and
+    the per-text averages are a weighted np.bincount.
+
+    TextBlob's look-back rules (a modifier reaching over short words, a
+    negation over one-letter words) are reproduced with running counts
+    over the token array. Its emoticons and "(!)" are not, and tokens
+    are split by blanking punctuation rather than with TextBlob's
+    tokenizer, so scores can differ a little. Use
+    benchmark_lexicon_scorer (or run this module with a corpus path and
+    text column) to measure agreement and speed before switching
+    SENTIMENT["scorer"] to "lexicon".
+
+    Functions:
+    - build_lexicon: Compiles the TextBlob lexicon into arrays.
+    - get_lexicon: Returns the lexicon shared by the process.
+    - score_lexicon: Scores a list of texts.
+    - benchmark_lexicon_scorer: Compares the scorer with TextBlob.
+    - load_benchmark_corpus: Reads article texts for the benchmark.
+"""
+
+import functools
+import os
+import string
+import time
+from itertools import chain
+import numpy as np
+import pandas as pd
+from config import DIRECTORIES, FILENAMES
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+
+# tokens are split on whitespace after punctuation other than hyphens
+# is blanked out and "!" is spaced; contractions are split first as
+# TextBlob's tokenizer does ("don't" -> "do", "n", "t")
+# curly quotes, dashes, ellipsis and guillemets count as punctuation too
+PUNCTUATION = (string.punctuation.replace("-", "")
+               + "\u2018\u2019\u201c\u201d\u2013\u2014\u2026\u00ab\u00bb")
+TOKEN_TABLE = str.maketrans({mark: " ! " if mark == "!" else " "
+                             for mark in PUNCTUATION})
+# TextBlob halves and flips the polarity of a negated word
+NEGATION_FACTOR = -0.5
+EXCLAMATION_FACTOR = 1.25
+# part of the sentiment cache key: bump it when a change to the rules
+# here changes the scores
+LEXICON_VERSION = 1
+
+
+@log_function_call(logger)
+def build_lexicon(lexicon=None):
+    """
+    Compile a pattern-style sentiment lexicon into arrays.
+
+    Parameters:
+        lexicon (textblob.en.Sentiment, optional): Defaults to the
+            lexicon of TextBlob's PatternAnalyzer.
+
+    Returns:
+        dict: tokens (pd.Index: lexicon words, then negations and "!");
+        polarity, subjectivity, intensity, is_modifier and is_ly arrays
+        over the lexicon words; n_words; is_negation over all tokens; and
+        exclamation (code of "!").
+    """
+    if lexicon is None:
+        from textblob.en import sentiment as lexicon
+    lexicon.load()
+
+    # texts are scored without part-of-speech tags, so TextBlob uses
+    # each word's untagged entry; multi-word entries never match tokens
+    words = [word for word in lexicon if " " not in word and None in
+             lexicon[word]]
+    values = np.array([lexicon[word][None] for word in words],
+                      dtype="float64")
+    is_modifier = np.array([any(pos in lexicon[word]
+                                for pos in lexicon.modifiers)
+                            for word in words])
+    # a negation does not end the reach of an "-ly" modifier
+    is_ly = np.array([bool(lexicon.modifier(word)) for word in words])
+    extra = [word for word in lexicon.negations if word not in words]
+    tokens = pd.Index(words + extra + ["!"])
+    is_negation = tokens.isin(lexicon.negations)
+
+    logger.info(f"Built sentiment lexicon with {len(words):,} words")
+    return {"tokens": tokens, "n_words": len(words),
+            "polarity": values[:, 0], "subjectivity": values[:, 1],
+            "intensity": values[:, 2], "is_modifier": is_modifier,
+            "is_ly": is_ly, "is_negation": is_negation, "exclamation": len(tokens) - 1}
+
+
+@functools.lru_cache(maxsize=1)
+def get_lexicon():
+    """Return build_lexicon(), built once per process."""
+    return build_lexicon()
+
+
+def _last_before(mask, text_ids):
+    # position of the last token before each token where mask is True,
+    # -1 when there is none earlier in the same text
+    positions = np.arange(len(mask))
+    last = np.maximum.accumulate(np.where(mask, positions, -1))
+    before = np.empty_like(last)
+    before[0] = -1
+    before[1:] = last[:-1]
+    before[(before >= 0) & (text_ids[np.maximum(before, 0)] != text_ids)] = -1
+    return before
+
+
+def _between(counts, start, end):
+    # occurrences strictly between positions start and end, from the
+    # inclusive running total counts
+    return counts[end - 1] - counts[start]
+
+
+def score_lexicon(texts, lexicon=None):
+    """
+    Score texts with the compiled lexicon.
+
+    Parameters:
+        texts (list): Strings.
+        lexicon (dict, optional): From build_lexicon; defaults to
+            get_lexicon().
+
+    Returns:
+        list: (polarity, subjectivity) per text, 0.0 for both when no
+        lexicon word is found, as with TextBlob.
+    """
+    lexicon = lexicon or get_lexicon()
+    token_lists = [text.lower().replace("n't", " n't").translate(TOKEN_TABLE)
+                   .split() for text in texts]
+    lengths = np.fromiter(map(len, token_lists), dtype="int64",
+                          count=len(token_lists))
+    text_ids = np.repeat(np.arange(len(token_lists)), lengths)
+    tokens = list(chain.from_iterable(token_lists))
+    if not tokens:
+        return [(0.0, 0.0)] * len(token_lists)
+    codes = lexicon["tokens"].get_indexer(tokens)
+
+    n_words = lexicon["n_words"]
+    known = (codes >= 0) & (codes < n_words)
+    word_codes = np.where(known, codes, 0)
+    polarity = np.where(known, lexicon["polarity"][word_codes], 0.0)
+    subjectivity = np.where(known, lexicon["subjectivity"][word_codes], 0.0)
+    intensity = np.where(known, lexicon["intensity"][word_codes], 1.0)
+    is_modifier = known & lexicon["is_modifier"][word_codes]
+    is_negation = (codes >= 0) & lexicon["is_negation"][np.maximum(codes, 0)]
+    token_lengths = np.fromiter(map(len, tokens), dtype="int64",
+                                count=len(tokens))
+
+    # the lexicon word each token could be modified or negated after
+    previous_word = _last_before(known, text_ids)
+    has_previous = previous_word >= 0
+    previous_word = np.maximum(previous_word, 0)
+
+    # "very good", "really is a good": the word takes the place of the
+    # modifier's own score, scaled by the modifier's intensity (inverted
+    # when the modifier is negated). Unknown words of up to two letters
+    # are skipped, as is a negation after an "-ly" modifier.
+    ly_modifier = lexicon["is_ly"][word_codes]
+    after_ly_modifier = (has_previous & is_modifier[previous_word]
+                         & ly_modifier[previous_word])
+    modifier_breaks = np.cumsum(~known & (token_lengths > 2)
+                                & ~(is_negation & after_ly_modifier))
+    reaches = _between(modifier_breaks, previous_word,
+                       np.arange(len(codes))) == 0
+    modified = known & has_previous & is_modifier[previous_word] & reaches
+
+    # "really not": a negation reached by an "-ly" modifier negates the
+    # modifier's entry instead of the next word
+    absorbed = is_negation & after_ly_modifier & reaches
+
+    # "not good", "not a good": any other negation carries over
+    # one-letter words up to the next lexicon word
+    negation = _last_before(is_negation & ~absorbed, text_ids)
+    negation_breaks = np.cumsum(~known & ~is_negation & (token_lengths > 1))
+    negated = (known & (negation >= 0)
+               & (~has_previous | (negation > previous_word))
+               & (_between(negation_breaks, np.maximum(negation, 0),
+                           np.arange(len(codes))) == 0))
+
+    modifier_intensity = np.where(negated, 1 / intensity,
+                                  intensity)[previous_word]
+    negated[previous_word[absorbed]] = True
+    polarity = np.where(modified,
+                        np.clip(polarity * modifier_intensity, -1, 1),
+                        polarity)
+    subjectivity = np.where(modified,
+                            np.clip(subjectivity * modifier_intensity, -1, 1),
+                            subjectivity)
+    # a chain of modified words ("not very very good") is one entry that
+    # ends on its last word and is negated when any of its words is
+    positions = np.arange(len(codes))
+    chain_start = np.maximum.accumulate(np.where(known & ~modified,
+                                                 positions, 0))
+    negated = known & (np.bincount(chain_start, negated,
+                                   minlength=len(codes))[chain_start] > 0)
+    weight = known.astype("float64")
+    weight[previous_word[modified]] = 0.0
+
+    # "good!": each exclamation mark boosts the lexicon word before it in
+    # the same text (lost if a later word of its chain replaces it)
+    marks = codes == lexicon["exclamation"]
+    targets = _last_before(known, text_ids)[marks]
+    boosts = np.bincount(targets[targets >= 0], minlength=len(codes))
+    polarity = np.clip(polarity * EXCLAMATION_FACTOR ** boosts, -1, 1)
+    polarity = np.where(negated, polarity * NEGATION_FACTOR, polarity)
+
+    n_texts = len(token_lists)
+    counts = np.maximum(np.bincount(text_ids, weight, minlength=n_texts), 1)
+    text_polarity = np.bincount(text_ids, polarity * weight,
+                                minlength=n_texts) / counts
+    text_subjectivity = np.bincount(text_ids, subjectivity * weight,
+                                    minlength=n_texts) / counts
+    return list(zip(text_polarity.tolist(), text_subjectivity.tolist()))
+
+
+def load_benchmark_corpus(path=None, column="text"):
+    """
+    Read article texts for the benchmark. dashboard_data.zip holds only
+    the scores, so the texts come from the pipeline's cleaned corpus
+    (FILENAMES data_dir combined_data_cleaned_fname) by default.
+    """
+    path = path or os.path.join(
+        DIRECTORIES["data_dir"],
+        FILENAMES["data_dir"]["combined_data_cleaned_fname"])
+    return pd.read_csv(path, usecols=[column])[column]
+
+
+@log_function_call(logger)
+def benchmark_lexicon_scorer(texts, sample_size=5000, random_state=0):
+    """
+    Compare score_lexicon with TextBlob (get_sentiment's scorer).
+
+    Parameters:
+        texts (pd.Series): Corpus texts; non-strings are skipped.
+        sample_size (int, optional): Texts sampled for the comparison,
+            None for all of them.
+        random_state (int): Sampling seed.
+
+    Returns:
+        dict: texts, seconds and texts per second of each scorer,
+        speedup, polarity and subjectivity correlation and mean absolute
+        difference, and the share of texts with the same polarity
+        category and the same sentiment label.
+    """
+    from sl_utils.sentiment import (score_texts,
+                                    polarity_categories,
+                                    sentiment_labels,
+                                    )
+
+    texts = texts[texts.map(lambda text: isinstance(text, str))]
+    if sample_size and len(texts) > sample_size:
+        texts = texts.sample(sample_size, random_state=random_state)
+    texts = texts.tolist()
+    get_lexicon()  # build outside the timing
+
+    timings, results = {}, {}
+    for name, scorer in [("textblob", lambda: score_texts(texts, "textblob")),
+                         ("lexicon", lambda: score_lexicon(texts))]:
+        start = time.perf_counter()
+        results[name] = np.array(scorer(), dtype="float64").reshape(-1, 2)
+        timings[name] = time.perf_counter() - start
+    reference, fast = results["textblob"], results["lexicon"]
+
+    report = {"texts": len(texts)}
+    for name, seconds in timings.items():
+        report[f"{name}_seconds"] = seconds
+        report[f"{name}_texts_per_second"] = len(texts) / max(seconds, 1e-9)
+    report["speedup"] = timings["textblob"] / max(timings["lexicon"], 1e-9)
+    for i, measure in enumerate(["polarity", "subjectivity"]):
+        report[f"{measure}_correlation"] = float(
+            np.corrcoef(reference[:, i], fast[:, i])[0, 1])
+        report[f"{measure}_mean_abs_diff"] = float(
+            np.abs(reference[:, i] - fast[:, i]).mean())
+    report["polarity_category_agreement"] = float(np.mean(
+        polarity_categories(reference[:, 0])
+        == polarity_categories(fast[:, 0])))
+    report["label_agreement"] = float(np.mean(
+        sentiment_labels(reference[:, 0], reference[:, 1])
+        == sentiment_labels(fast[:, 0], fast[:, 1])))
+    logger.info("Lexicon scorer benchmark: " + ", ".join(
+        f"{key}={value:.3f}" if isinstance(value, float)
+        else f"{key}={value}" for key, value in report.items()))
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    corpus = load_benchmark_corpus(*sys.argv[1:3])
+    for key, value in benchmark_lexicon_scorer(corpus).items():
+        print(f"{key:>32}: {value:,.3f}" if isinstance(value, float)
+              else f"{key:>32}: {value:,}")
+
+
+# Path: sl_utils/lexicon_sentiment.py
+# end of file
@@ -0,0 +1,254 @@
+"""
+Description: Codec for list columns such as the locations of an article.
+
+    Lists written to CSV become Python list literals ("['paris', 'rome']")
+    which utils.string_to_list parses back one row at a time with
+    ast.literal_eval. Here list columns are stored natively instead:
+    as Arrow list<string> columns in Parquet, or exploded into a table
+    of (row, value id) pairs plus one vocabulary of the distinct values.
+
+    Legacy CSVs and zips are still read. Their list literals are parsed
+    for the whole column at once: literals that are plain single-quoted
+    strings, which is what str(list) writes for ordinary names, are
+    split by Arrow compute (or a compiled regex without pyarrow). Only
+    the rest, e.g. names holding a quote or a backslash, go through
+    ast.literal_eval. The result is the same as string_to_list's.
+
+    Functions:
+    - parse_list_column: string_to_list for a whole column.
+    - parse_list_array: Parses list literals into an Arrow list array.
+    - explode_list_column: Splits a list column into pairs + vocabulary.
+    - implode_list_column: Rebuilds the list column from the pairs.
+    - write_list_table: Writes a frame with list columns to Parquet.
+    - read_list_table: Reads list columns from Parquet or a legacy CSV.
+"""
+
+import ast
+import os
+import re
+import numpy as np
+import pandas as pd
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # without pyarrow literals are split with re, no Parquet
+    pa = pc = pq = None
+
+# a list literal holding only single-quoted strings without single quotes or
+# backslashes, exactly as str(list) writes them
+SIMPLE_LIST = re.compile(r"\[(?:'[^'\\]*'(?:, '[^'\\]*')*)?\]")
+SEPARATOR = "', '"
+
+
+def _literal_list(text):
+    # utils.string_to_list
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, TypeError):
+        return []
+
+
+def _parse_value(value):
+    # a row that is not a SIMPLE_LIST literal: lists and tuples are
+    # already parsed, other strings go through string_to_list
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return _literal_list(value) if isinstance(value, str) else []
+
+
+def _split_simple(text):
+    # items of a SIMPLE_LIST literal
+    return text[2:-2].split(SEPARATOR) if text != "[]" else []
+
+
+def _simple_mask(values):
+    """Return the strings of values and a mask of the SIMPLE_LIST ones."""
+    is_text = values.map(lambda value: isinstance(value, str)).to_numpy(bool)
+    texts = values.where(is_text, "").astype(str)
+    if pa is not None:
+        strings = pa.array(texts.to_numpy(object), type=pa.string())
+        simple = pc.match_substring_regex(
+            strings, f"^{SIMPLE_LIST.pattern}$").to_numpy(zero_copy_only=False)
+    else:
+        strings = texts.tolist()
+        simple = np.fromiter((SIMPLE_LIST.fullmatch(text) is not None
+                              for text in strings), dtype=bool,
+                             count=len(strings))
+    return strings, simple & is_text
+
+
+def _split_array(strings):
+    # Arrow list<string> of the items of SIMPLE_LIST literals
+    items = pc.split_pattern(pc.utf8_slice_codeunits(strings, 2, -2),
+                             SEPARATOR)
+    return pc.if_else(pc.equal(strings, "[]"),
+                      pa.scalar([], pa.list_(pa.string())), items)
+
+
+@log_function_call(logger)
+def parse_list_column(values):
+    """
+    Parse a column of list literals, as values.map(string_to_list).
+
+    Parameters:
+        values (pd.Series): List literals; lists and tuples are kept as
+            lists, anything else that does not parse (including NaN)
+            becomes [].
+
+    Returns:
+        pd.Series: Python lists, indexed like values.
+    """
+    strings, simple = _simple_mask(values)
+    if pa is not None:
+        fast = _split_array(strings.filter(pa.array(simple))).to_pylist()
+    else:
+        fast = [_split_simple(text) for text, keep in zip(strings, simple)
+                if keep]
+    parsed = np.empty(len(values), dtype=object)
+    for i, items in zip(np.flatnonzero(simple), fast):
+        parsed[i] = items
+    for i in np.flatnonzero(~simple):
+        parsed[i] = _parse_value(values.iat[i])
+    logger.info(f"Parsed {len(values):,} list literals,"
+                f" {int((~simple).sum()):,} not split directly")
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+
+def _as_strings(items):
+    # a parsed literal as Arrow can store it: a list of strings
+    if not isinstance(items, (list, tuple)):
+        return []
+    return [str(item) for item in items]
+
+
+def parse_list_array(values):
+    """
+    Parse a column of list literals into an Arrow list<string> array.
+    Lists and tuples are stored as they are, rows that do not parse to
+    a list are empty lists and items that are not strings are converted
+    with str. Needs pyarrow.
+    """
+    strings, simple = _simple_mask(values)
+    simple_rows = np.flatnonzero(simple)
+    other_rows = np.flatnonzero(~simple)
+    parsed = pa.concat_arrays([
+        _split_array(strings.take(pa.array(simple_rows))),
+        pa.array([_as_strings(_parse_value(values.iat[i]))
+                  for i in other_rows], type=pa.list_(pa.string())),
+    ])
+    # back to the input order
+    order = np.argsort(np.concatenate([simple_rows, other_rows]),
+                       kind="stable")
+    return parsed.take(pa.array(order))
+
+
+def explode_list_column(lists, value_name="value"):
+    """
+    Split a list column into integer pairs and a vocabulary.
+
+    Parameters:
+        lists (pd.Series): Lists (e.g. of locations), indexed by row id
+            (e.g. article_id).
+        value_name (str): Name of the value, e.g. "location"; the id
+            column is "{value_name}_id".
+
+    Returns:
+        tuple: (pairs, vocabulary). pairs is a DataFrame with the index
+        name of lists (or "row") and "{value_name}_id" columns, one row
+        per list item; vocabulary is a pd.Index of the distinct values,
+        positioned by id.
+    """
+    exploded = lists.explode().dropna()
+    ids, vocabulary = pd.factorize(exploded)
+    pairs = pd.DataFrame({
+        lists.index.name or "row": exploded.index.to_numpy(),
+        f"{value_name}_id": ids.astype("int32"),
+    })
+    return pairs, pd.Index(vocabulary, name=value_name)
+
+
+def implode_list_column(pairs, vocabulary, index=None):
+    """
+    Rebuild the list column explode_list_column split.
+
+    Parameters:
+        pairs (pd.DataFrame): (row id, value id) pairs, in this column
+            order.
+        vocabulary (pd.Index): Values positioned by id.
+        index (pd.Index, optional): Row ids of the result; rows without
+            pairs get []. Defaults to the row ids found in pairs.
+
+    Returns:
+        pd.Series: A list per row id, named vocabulary.name.
+    """
+    row_column, id_column = pairs.columns[:2]
+    values = pd.Series(vocabulary.to_numpy()[pairs[id_column].to_numpy()],
+                       index=pd.Index(pairs[row_column], name=row_column))
+    lists = values.groupby(level=0, sort=False).agg(list)
+    if index is not None:
+        lists = lists.reindex(index).map(
+            lambda items: items if isinstance(items, list) else [])
+    return lists.rename(vocabulary.name)
+
+
+@log_function_call(logger)
+def write_list_table(df, path, list_columns):
+    """
+    Write df to Parquet with list_columns as Arrow list<string>.
+
+    Parameters:
+        df (pd.DataFrame): Rows to write. List columns may hold lists,
+            (legacy) list literals, which are parsed, or a mix of both.
+        path (str): Parquet file to write.
+        list_columns (list): Names of the list columns.
+    """
+    arrays = {column: parse_list_array(df[column])
+              for column in list_columns}
+    others = df.drop(columns=list_columns)
+    if len(others.columns):
+        table = pa.Table.from_pandas(others, preserve_index=False)
+        for column, array in arrays.items():
+            table = table.append_column(column, array)
+    else:
+        # a frame without columns converts to a table without rows
+        table = pa.table(arrays)
+    table = table.select(list(df.columns))
+    # write to a temp file first so a crash never leaves a partial file
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote {len(df):,} rows with list columns {list_columns}"
+                f" to {path}")
+
+
+@log_function_call(logger)
+def read_list_table(path, list_columns):
+    """
+    Read a frame with list columns.
+
+    Parameters:
+        path (str): Parquet written by write_list_table, or a legacy CSV
+            (or zip holding one) with list literals.
+        list_columns (list): Names of the list columns.
+
+    Returns:
+        pd.DataFrame: The frame, with Python lists in list_columns.
+    """
+    if path.endswith(".parquet"):
+        table = pq.read_table(path, memory_map=True)
+        df = table.drop(list_columns).to_pandas()
+        for column in list_columns:
+            df[column] = pd.Series(table.column(column).to_pylist(),
+                                   index=df.index, dtype=object)
+        return df[table.column_names]
+    df = pd.read_csv(path)
+    for column in list_columns:
+        df[column] = parse_list_column(df[column])
+    return df
+
+
+# Path: sl_utils/list_columns.py
+# end of file
@@ -0,0 +1,173 @@
+"""
+Description: Batched location extraction from article text.
+
+    extract_locations used to run the full spaCy pipeline on one article
+    at a time, although only GPE entities are used. The batched
+    extractor here follows the same rule: known locations found by
+    keyword matching win, and spaCy named entities are the fallback. It
+    runs the keyword matcher on every article first and sends only the
+    articles with no match through spaCy. spaCy runs via nlp.pipe, with
+    every component the NER does not need disabled, in batches and
+    optionally several processes. One nlp.pipe call serves the whole
+    stream, so its worker processes and their model copies start once.
+
+    Articles are read and keyword-matched chunk by chunk and results are
+    yielded as spaCy returns them, so memory stays bounded however large
+    the corpus is.
+
+    Functions:
+    - load_ner_model: Loads a spaCy model with only NER enabled.
+    - get_ner_model: Returns a shared NER-only model.
+    - extract_locations_batch: Streams (article_id, locations).
+    - extract_locations: Locations of one text.
+"""
+
+import collections
+import functools
+import itertools
+from itertools import islice
+from config import NLP_EXTRACTION
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+from sl_utils.location_matcher import extract_many
+
+# the components the GPE lookup needs; anything they listen to
+# (e.g. a shared tok2vec) is kept enabled as well
+NER_COMPONENTS = ("ner",)
+
+
+@log_function_call(logger)
+def load_ner_model(model_name=None, keep=NER_COMPONENTS):
+    """
+    Load a spaCy model with every component except keep (and what
+    they depend on) disabled.
+    """
+    import spacy
+
+    nlp = spacy.load(model_name or NLP_EXTRACTION["model"])
+    needed = set(keep)
+    for name, component in nlp.pipeline:
+        if set(getattr(component, "listening_components", [])) & needed:
+            needed.add(name)
+    nlp.select_pipes(enable=[name for name in nlp.pipe_names
+                             if name in needed])
+    logger.info(f"Loaded {nlp.meta.get('name')} with {nlp.pipe_names}")
+    return nlp
+
+
+@functools.lru_cache(maxsize=2)
+def get_ner_model(model_name=None):
+    """Return a NER-only model, loaded once per process."""
+    return load_ner_model(model_name)
+
+
+def _keyword_chunks(articles, keyword_processor, chunk_size):
+    """
+    Read articles chunk by chunk and yield each chunk as a list of
+    (article_id, text, set of known locations found).
+    """
+    articles = iter(articles)
+    processed = 0
+    while True:
+        chunk = [(article_id, str(text)) for article_id, text
+                 in islice(articles, chunk_size)]
+        if not chunk:
+            return
+        if keyword_processor is None:
+            found = [set() for _ in chunk]
+        else:
+            found = [set(locations) for locations in extract_many(
+                (text for _, text in chunk), keyword_processor)]
+        processed += len(chunk)
+        unmatched = sum(1 for locations in found if not locations)
+        logger.info(f"Read {processed:,} articles ({unmatched:,} of the"
+                    f" last {len(chunk):,} need spaCy)")
+        yield [(article_id, text, locations) for (article_id, text),
+               locations in zip(chunk, found)]
+
+
+def _extract_with_ner(chunks, nlp, batch_size, n_process):
+    """
+    Run one nlp.pipe over the unmatched articles of all chunks, so its
+    worker processes (and their copies of the model) start once, and
+    yield every article's (article_id, locations) in input order.
+    """
+    # [article_id, locations] per article read, in input order; None
+    # until spaCy has processed an unmatched article
+    pending = collections.deque()
+
+    def unmatched_texts():
+        for chunk in chunks:
+            sent = False
+            for article_id, text, found in chunk:
+                entry = [article_id, found or None]
+                pending.append(entry)
+                if not found:
+                    sent = True
+                    yield text, entry
+            if not sent:
+                # an empty marker text: when it comes out of the pipe
+                # the matched chunk before it is yielded, so a long run
+                # of matched articles is never held back
+                yield "", None
+
+    def ready():
+        while pending and pending[0][1] is not None:
+            article_id, found = pending.popleft()
+            yield article_id, list(found)
+
+    for doc, entry in nlp.pipe(unmatched_texts(), as_tuples=True,
+                               batch_size=batch_size, n_process=n_process):
+        if entry is not None:
+            entry[1] = {ent.text.lower() for ent in doc.ents
+                        if ent.label_ == "GPE"}
+        yield from ready()
+    yield from ready()
+
+
+def extract_locations_batch(articles, keyword_processor=None, nlp=None,
+                            batch_size=None, n_process=None,
+                            chunk_size=None):
+    """
+    Extract locations from many articles, streaming the results.
+
+    Parameters:
+        articles (iterable): (article_id, text) pairs.
+        keyword_processor (KeywordProcessor, optional): Known-location
+            matcher (see location_matcher); its matches win over spaCy
+            entities. Without one only spaCy entities are used.
+        nlp (spacy.Language, optional): Defaults to get_ner_model().
+        batch_size, n_process, chunk_size (int, optional): nlp.pipe
+            batch size and processes, and how many articles are read
+            and keyword-matched per chunk. Default to NLP_EXTRACTION.
+
+    Yields:
+        tuple: (article_id, list of lower-case locations), in input
+        order.
+    """
+    batch_size = batch_size or NLP_EXTRACTION["batch_size"]
+    n_process = n_process or NLP_EXTRACTION["n_process"]
+    chunk_size = chunk_size or NLP_EXTRACTION["chunk_size"]
+    chunks = _keyword_chunks(articles, keyword_processor, chunk_size)
+
+    for chunk in chunks:
+        if all(found for _, _, found in chunk):
+            for article_id, _, found in chunk:
+                yield article_id, list(found)
+            continue
+        # spaCy is needed from here on: a single nlp.pipe call covers
+        # this chunk and the rest of the stream
+        yield from _extract_with_ner(itertools.chain([chunk], chunks),
+                                     nlp or get_ner_model(), batch_size,
+                                     n_process)
+        return
+
+
+def extract_locations(text, keyword_processor=None, nlp=None):
+    """Extracts location names from text using NLP and predefined list."""
+    _, locations = next(extract_locations_batch(
+        [(None, text)], keyword_processor, nlp, n_process=1))
+    return locations
+
+
+# Path: sl_utils/location_extraction.py
+# end of file
@@ -0,0 +1,143 @@
+"""
+Description: Persisted keyword matcher for known locations.
+
+    Known locations are matched in article text with a flashtext
+    KeywordProcessor, an Aho-Corasick style trie built from the
+    unique-locations list. Building it from unique_locations.zip on
+    every pipeline run is wasted work, so the built processor is pickled
+    next to the source file. The file name carries a hash of the
+    source's contents. Later runs unpickle that file instead of reading
+    and indexing the CSV again. When the source changes, the matcher is
+    rebuilt and older pickles are removed.
+
+    Functions:
+    - build_location_matcher: Builds a KeywordProcessor from locations.
+    - load_location_matcher: Loads the persisted matcher or builds it.
+    - get_location_matcher: Returns the matcher shared by the process.
+    - extract_many: Known locations found in each of many texts.
+"""
+
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import zipfile
+import pandas as pd
+from config import LOCATION_MATCHER
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+
+
+def _source_hash(source):
+    digest = hashlib.md5()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def matcher_path(source, source_hash=None):
+    """Return the path of the pickled matcher for source."""
+    source_hash = source_hash or _source_hash(source)
+    return f"{source}.kwp-{source_hash}.pkl"
+
+
+def read_location_list(source):
+    """
+    Read the unique-locations file (CSV, or zip holding one CSV) and
+    return the locations not flagged in LOCATION_MATCHER["ignore_column"].
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            with archive.open(archive.namelist()[0]) as f:
+                locations = pd.read_csv(f)
+    else:
+        locations = pd.read_csv(source)
+    ignore_column = LOCATION_MATCHER["ignore_column"]
+    if ignore_column in locations.columns:
+        locations = locations[locations[ignore_column] != 1]
+    return (locations[LOCATION_MATCHER["location_column"]]
+            .dropna().astype(str).str.strip().str.lower()
+            .loc[lambda names: names != ""].unique().tolist())
+
+
+@log_function_call(logger)
+def build_location_matcher(locations):
+    """Return a case-insensitive KeywordProcessor for locations."""
+    from flashtext import KeywordProcessor
+
+    matcher = KeywordProcessor()
+    matcher.add_keywords_from_list(list(locations))
+    logger.info(f"Built location matcher with {len(matcher):,} keywords")
+    return matcher
+
+
+def _write_matcher(matcher, path):
+    # write to a temp file first so a crash never leaves a partial pickle
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+@log_function_call(logger)
+def load_location_matcher(source=None):
+    """
+    Return the location matcher for source (default
+    LOCATION_MATCHER["source"]), loading the persisted copy when it
+    was built from the current contents of source.
+    """
+    source = source or LOCATION_MATCHER["source"]
+    path = matcher_path(source)
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                matcher = pickle.load(f)
+            logger.debug(f"Loaded location matcher from {path}")
+            return matcher
+        except Exception as e:
+            # a truncated file raises EOFError, a pickle from another
+            # flashtext version AttributeError or ImportError: the
+            # matcher can always be rebuilt from source
+            logger.warning(f"Could not load {path}, rebuilding:"
+                           f" {type(e).__name__}: {e}")
+
+    matcher = build_location_matcher(read_location_list(source))
+    try:
+        _write_matcher(matcher, path)
+        for stale in glob.glob(f"{glob.escape(source)}.kwp-*.pkl"):
+            if stale != path:
+                os.remove(stale)
+        logger.info(f"Wrote location matcher {path}")
+    except OSError as e:
+        logger.warning(f"Could not write {path}: {e}")
+    return matcher
+
+
+@functools.lru_cache(maxsize=4)
+def get_location_matcher(source=None):
+    """Return load_location_matcher(source), loaded once per process."""
+    return load_location_matcher(source)
+
+
+def extract_many(texts, matcher=None):
+    """
+    Return the known locations found in each text.
+
+    Parameters:
+        texts (iterable): Article texts; non-strings are converted.
+        matcher (KeywordProcessor, optional): Defaults to
+            get_location_matcher().
+
+    Returns:
+        list: One list of distinct lower-case locations per text.
+    """
+    # an empty KeywordProcessor is falsy, so test for None explicitly
+    if matcher is None:
+        matcher = get_location_matcher()
+    return [list(set(matcher.extract_keywords(str(text).lower())))
+            for text in texts]
+
+
+# Path: sl_utils/location_matcher.py
+# end of file
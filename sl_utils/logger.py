@@ -59,8 +59,11 @@ def log_function_call(logger):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                logger.debug(f"Calling {func.__name__} with"
-                             f" args={args}, kwargs={kwargs}")
+                # formatting DataFrame arguments is expensive, only
+                # do it when debug logging is actually on
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Calling {func.__name__} with"
+                                 f" args={args}, kwargs={kwargs}")
                 result = func(*args, **kwargs)
                 logger.info(f"{func.__name__} executed successfully")
                 return result
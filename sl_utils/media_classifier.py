@@ -0,0 +1,216 @@
+"""
+Description: Compiled media-type classifier for whole columns.
+
+    classify_media rebuilds its keyword dictionary on every call,
+    lowercases the text again for every media type, and tests each
+    keyword with a Python substring loop, one row at a time. Here each
+    media type's keywords are compiled once into one regular expression.
+    A whole Series is lowercased once and matched against each
+    expression in Arrow's vectorized RE2 engine, which turns the keyword
+    alternation into an automaton (plain re is used when pyarrow is
+    missing). The types are tried in priority order, each on the texts
+    no earlier type matched. The result is a categorical column.
+
+    By default keywords match whole words (plus a plural "s"), so "x"
+    no longer matches every text containing the letter x, and "ig" no
+    longer matches "big". whole_words=False keeps classify_media's
+    substring matching and reproduces its output. Non-ASCII characters
+    are replaced by ASCII stand-ins before matching, so RE2's ASCII word
+    boundaries fall where re's would.
+
+    Functions:
+    - compile_media_patterns: Builds the keyword regexes.
+    - classify_media_series: Media type of every text of a Series.
+    - benchmark_media_classifier: Compares with classify_media.
+"""
+
+import functools
+import re
+import time
+import numpy as np
+import pandas as pd
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # without pyarrow each text is searched with re
+    pa = pc = None
+
+# media type -> keywords; the first type with a matching keyword wins
+MEDIA_KEYWORDS = {'video': ['video', 'watch', 'live',
+                            'stream', 'youtube',
+                            'vimeo', 'twitch'],
+                  'audio': ['audio', 'listen', 'podcast', 'radio'],
+                  'image': ['image', 'photo', 'picture', 'gif'],
+                  'infographic': ['infographic'],
+                  'poll': ['poll'],
+                  'twitter': ['twitter', 'X', 'x', 'tweet', 'retweeted'],
+                  'facebook': ['facebook', 'fb', 'like', 'share', 'comment'],
+                  'instagram': ['instagram', 'ig', ],
+                  'linkedin': ['linkedin', 'share'],
+                  }
+DEFAULT_MEDIA_TYPE = 'text'
+MEDIA_TYPES = list(MEDIA_KEYWORDS) + [DEFAULT_MEDIA_TYPE]
+
+
+# non-ASCII characters, replaced before matching (see _ascii_text)
+NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+
+@functools.lru_cache(maxsize=2)
+def compile_media_patterns(whole_words=True):
+    """
+    Return [(media type, compiled regex)] in priority order.
+
+    Texts are lowercased before matching, so keywords are too
+    (classify_media's "X" could never match after lowercasing).
+    """
+    patterns = []
+    for media_type, keywords in MEDIA_KEYWORDS.items():
+        alternatives = "|".join(re.escape(keyword) for keyword in
+                                sorted({k.lower() for k in keywords},
+                                       key=len, reverse=True))
+        if whole_words:
+            alternatives = rf"\b(?:{alternatives})s?\b"
+        patterns.append((media_type, re.compile(alternatives)))
+    return patterns
+
+
+def _ascii_stand_in(match):
+    return "_" if match.group().isalnum() else " "
+
+
+def _ascii_text(text):
+    """
+    Replace non-ASCII word characters with "_" and any other non-ASCII
+    character with a space. RE2 only knows ASCII word boundaries; after
+    this they fall where re's Unicode \b would. Neither replacement
+    occurs in a keyword, so no substring match is created or lost.
+    """
+    return text if text.isascii() else NON_ASCII.sub(_ascii_stand_in, text)
+
+
+def _search(lowered, pattern):
+    # match mask of pattern over lowered texts (Arrow array or list)
+    if pa is not None:
+        return pc.match_substring_regex(lowered, pattern.pattern
+                                        ).to_numpy(zero_copy_only=False)
+    return np.fromiter((pattern.search(text) is not None
+                        for text in lowered), dtype=bool, count=len(lowered))
+
+
+def _keep(lowered, mask):
+    if pa is not None:
+        return lowered.filter(pa.array(mask))
+    return [text for text, keep in zip(lowered, mask) if keep]
+
+
+def _first_match_codes(texts, patterns, default):
+    """
+    Return, per text, the index of the first pattern that matches it
+    (default when none does; non-strings never match). Each pattern
+    only searches the texts no earlier pattern matched.
+    """
+    is_text = texts.map(lambda text: isinstance(text, str)).to_numpy(bool)
+    codes = np.full(len(texts), default, dtype="int64")
+    remaining = np.flatnonzero(is_text)
+    # str.lower, as classify_media (Arrow's lowercasing differs for a
+    # few characters such as the dotted capital I)
+    lowered = [_ascii_text(text.lower()) for text in texts.iloc[remaining]]
+    if pa is not None:
+        lowered = pa.array(lowered, type=pa.string())
+
+    # one pass with all patterns first drops the texts none matches
+    any_pattern = re.compile("|".join(f"(?:{pattern.pattern})"
+                                      for pattern in patterns))
+    found = _search(lowered, any_pattern)
+    lowered, remaining = _keep(lowered, found), remaining[found]
+    for code, pattern in enumerate(patterns):
+        if not len(remaining):
+            break
+        found = _search(lowered, pattern)
+        codes[remaining[found]] = code
+        lowered, remaining = _keep(lowered, ~found), remaining[~found]
+    return codes
+
+
+@log_function_call(logger)
+def classify_media_series(texts, whole_words=True):
+    """
+    Classify the media type of every text.
+
+    Parameters:
+        texts (pd.Series): Texts; missing or non-string values are
+            DEFAULT_MEDIA_TYPE, as in classify_media.
+        whole_words (bool): Match keywords as whole words; False matches
+            substrings exactly like classify_media.
+
+    Returns:
+        pd.Series: Categorical media type (categories MEDIA_TYPES),
+        indexed like texts.
+    """
+    # MEDIA_TYPES starts with the keyword types in priority order, so a
+    # pattern's position is the category code of its type
+    codes = _first_match_codes(
+        texts, [pattern for _, pattern in compile_media_patterns(whole_words)],
+        MEDIA_TYPES.index(DEFAULT_MEDIA_TYPE))
+    return pd.Series(pd.Categorical.from_codes(codes.astype("int8"),
+                                               MEDIA_TYPES),
+                     index=texts.index, name=texts.name)
+
+
+@log_function_call(logger)
+def benchmark_media_classifier(texts):
+    """
+    Compare classify_media_series with utils.classify_media.
+
+    Parameters:
+        texts (pd.Series): Corpus texts.
+
+    Returns:
+        dict: rows; seconds of classify_media and of both matching
+        modes; speedup of the substring mode; the share of rows each
+        mode agrees on with classify_media; and changes, a crosstab of
+        classify_media's types against the whole-word types.
+    """
+    from sl_utils.utils import classify_media
+
+    start = time.perf_counter()
+    reference = texts.map(classify_media)
+    reference_seconds = time.perf_counter() - start
+
+    report = {"rows": len(texts), "classify_media_seconds": reference_seconds}
+    results = {}
+    for mode, whole_words in [("substring", False), ("whole_word", True)]:
+        start = time.perf_counter()
+        results[mode] = classify_media_series(texts, whole_words)
+        report[f"{mode}_seconds"] = time.perf_counter() - start
+        report[f"{mode}_agreement"] = float(
+            (results[mode].astype(object) == reference).mean())
+    report["speedup"] = reference_seconds / max(report["substring_seconds"],
+                                                1e-9)
+    report["changes"] = pd.crosstab(reference.rename("classify_media"),
+                                    results["whole_word"]
+                                    .rename("whole_word"))
+    logger.info("Media classifier benchmark: " + ", ".join(
+        f"{key}={value:.3f}" if isinstance(value, float)
+        else f"{key}={value}" for key, value in report.items()
+        if key != "changes"))
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    from sl_utils.lexicon_sentiment import load_benchmark_corpus
+
+    report = benchmark_media_classifier(load_benchmark_corpus(*sys.argv[1:3]))
+    changes = report.pop("changes")
+    for key, value in report.items():
+        print(f"{key:>24}: {value:,.3f}" if isinstance(value, float)
+              else f"{key:>24}: {value:,}")
+    print(changes)
+
+
+# Path: sl_utils/media_classifier.py
+# end of file
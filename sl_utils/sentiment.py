@@ -0,0 +1,287 @@
+"""
+Description: Batched, cached sentiment scoring for the corpus pipeline.
+
+    get_sentiment scores one text at a time with TextBlob and is applied
+    row by row to titles and article bodies. This stage scores whole
+    columns instead. Every score is stored in a SQLite cache keyed by
+    the scorer, its version and a hash of the text, so a corpus refresh
+    only scores new or changed texts, and upgrading TextBlob or changing
+    the lexicon scorer scores them again. Duplicate texts are scored
+    once. The remaining texts are scored in chunks on a process pool.
+    The scorer is TextBlob, or the faster array-based "lexicon" scorer
+    (see lexicon_sentiment), chosen with SENTIMENT["scorer"] or per
+    call.
+
+    The polarity and subjectivity categories are computed for whole
+    arrays with np.select, with the same thresholds and labels as
+    utils.categorize_polarity and utils.categorize_subjectivity. As
+    there, a missing score falls through to the last category.
+
+    Functions:
+    - text_key: Cache key of a text.
+    - scorer_key: Cache key of a scorer and its version.
+    - SentimentCache: SQLite store of sentiment scores.
+    - score_texts: Scores texts in this process.
+    - sentiment_scores: Scores a Series through the cache.
+    - polarity_categories: Vectorized categorize_polarity.
+    - subjectivity_categories: Vectorized categorize_subjectivity.
+    - sentiment_labels: "<polarity> <subjectivity>" labels.
+    - add_sentiment_columns: Adds the dashboard's sentiment columns.
+"""
+
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import SENTIMENT
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+from sl_utils.lexicon_sentiment import LEXICON_VERSION, score_lexicon
+
+SCORE_COLUMNS = ["polarity", "subjectivity"]
+
+
+def text_key(text):
+    """Return the cache key of a text: the SHA-1 of its UTF-8 bytes."""
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class SentimentCache:
+    """
+    SQLite cache of (polarity, subjectivity) keyed by scorer_key and
+    text hash. Safe to share between threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or SENTIMENT["cache_path"]
+        self._lock = threading.Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection = sqlite3.connect(self.path,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment ("
+                " scorer TEXT NOT NULL, text_key TEXT NOT NULL,"
+                " polarity REAL NOT NULL, subjectivity REAL NOT NULL,"
+                " scored_at REAL NOT NULL,"
+                " PRIMARY KEY (scorer, text_key))")
+
+    def get_many(self, scorer, keys):
+        """Return {key: (polarity, subjectivity)} of the cached keys."""
+        keys = list(keys)
+        results = {}
+        with self._lock:
+            # stay below SQLite's limit on query parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    "SELECT text_key, polarity, subjectivity FROM sentiment"
+                    f" WHERE scorer = ? AND text_key IN"
+                    f" ({','.join('?' * len(chunk))})",
+                    [scorer] + chunk).fetchall()
+                results.update((key, (polarity, subjectivity))
+                               for key, polarity, subjectivity in rows)
+        return results
+
+    def put_many(self, scorer, scores):
+        """Store {key: (polarity, subjectivity)}."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO sentiment VALUES (?, ?, ?, ?, ?)",
+                [(scorer, key, polarity, subjectivity, now)
+                 for key, (polarity, subjectivity) in scores.items()])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _score_textblob(texts):
+    from textblob import TextBlob
+
+    scores = []
+    for text in texts:
+        sentiment = TextBlob(text).sentiment
+        scores.append((sentiment.polarity, sentiment.subjectivity))
+    return scores
+
+
+# scorer name -> function scoring a list of strings; the name and version
+# are the cache key (see scorer_key), so scores of different scorers never
+# mix
+SCORERS = {"textblob": _score_textblob,
+           # TextBlob's lexicon scored as arrays, see lexicon_sentiment
+           "lexicon": score_lexicon,
+           }
+
+
+def scorer_key(scorer):
+    """
+    Return the cache key of a scorer: its name and version, so cached
+    scores are not used after TextBlob or the lexicon scorer changes.
+    """
+    import textblob
+
+    textblob_key = f"textblob:{textblob.__version__}"
+    if scorer == "lexicon":
+        # the lexicon scorer compiles TextBlob's lexicon
+        return f"lexicon:{LEXICON_VERSION}/{textblob_key}"
+    return textblob_key if scorer == "textblob" else scorer
+
+
+def score_texts(texts, scorer=None):
+    """
+    Score texts in this process.
+
+    Parameters:
+        texts (list): Strings.
+        scorer (str, optional): Key of SCORERS. Defaults to
+            SENTIMENT["scorer"].
+
+    Returns:
+        list: (polarity, subjectivity) per text.
+    """
+    return SCORERS[scorer or SENTIMENT["scorer"]](texts)
+
+
+def _score_chunks(texts, scorer, n_process, chunk_size):
+    # yields (start, scores of texts[start:start + chunk_size]) in order
+    starts = range(0, len(texts), chunk_size)
+    if n_process <= 1 or len(starts) <= 1:
+        for start in starts:
+            yield start, score_texts(texts[start:start + chunk_size], scorer)
+        return
+    with ProcessPoolExecutor(max_workers=n_process) as pool:
+        in_flight = collections.deque()
+        for start in starts:
+            in_flight.append((start, pool.submit(
+                score_texts, texts[start:start + chunk_size], scorer)))
+            if len(in_flight) >= 2 * n_process:
+                start, future = in_flight.popleft()
+                yield start, future.result()
+        while in_flight:
+            start, future = in_flight.popleft()
+            yield start, future.result()
+
+
+@log_function_call(logger)
+def sentiment_scores(texts, cache=None, scorer=None, n_process=None,
+                     chunk_size=None):
+    """
+    Score a Series of texts, only scoring texts not already cached.
+
+    Parameters:
+        texts (pd.Series): Texts; non-strings get no score (NaN), as
+            with get_sentiment.
+        cache (SentimentCache, optional): Defaults to one at
+            SENTIMENT["cache_path"].
+        scorer (str, optional): Key of SCORERS, defaults to
+            SENTIMENT["scorer"].
+        n_process, chunk_size (int, optional): Worker processes and
+            texts per task. Default to SENTIMENT.
+
+    Returns:
+        pd.DataFrame: polarity and subjectivity columns, indexed like
+        texts.
+    """
+    scorer = scorer or SENTIMENT["scorer"]
+    n_process = n_process or SENTIMENT["n_process"]
+    chunk_size = chunk_size or SENTIMENT["chunk_size"]
+    own_cache = cache is None
+    cache = cache or SentimentCache()
+
+    is_text = texts.map(lambda text: isinstance(text, str))
+    keys = texts[is_text].map(text_key)
+    unique = dict(zip(keys, texts[is_text]))
+    cache_scorer = scorer_key(scorer)
+    try:
+        scores = cache.get_many(cache_scorer, unique)
+        missing = [key for key in unique if key not in scores]
+        logger.info(f"Sentiment of {len(unique):,} distinct texts:"
+                    f" {len(scores):,} cached, {len(missing):,} to score")
+        for start, chunk_scores in _score_chunks(
+                [unique[key] for key in missing], scorer, n_process,
+                chunk_size):
+            new_scores = dict(zip(missing[start:start + chunk_size],
+                                  chunk_scores))
+            cache.put_many(cache_scorer, new_scores)
+            scores.update(new_scores)
+    finally:
+        if own_cache:
+            cache.close()
+
+    result = pd.DataFrame(np.nan, index=texts.index, columns=SCORE_COLUMNS)
+    if len(keys):
+        result.loc[is_text, SCORE_COLUMNS] = [scores[key] for key in keys]
+    return result
+
+
+def _scores_array(values):
+    # None and NaN both become NaN, which no threshold test matches
+    return np.asarray(values, dtype="float64")
+
+
+def polarity_categories(polarity):
+    """
+    Vectorized utils.categorize_polarity.
+
+    Parameters:
+        polarity (array-like): Polarity scores.
+
+    Returns:
+        np.ndarray: 'positive', 'negative' or 'neutral' per score.
+    """
+    polarity = _scores_array(polarity)
+    return np.select([polarity > 0, polarity < 0],
+                     ['positive', 'negative'], default='neutral')
+
+
+def subjectivity_categories(subjectivity):
+    """
+    Vectorized utils.categorize_subjectivity (labels unchanged,
+    including 'higly objective').
+    """
+    subjectivity = _scores_array(subjectivity)
+    return np.select([subjectivity > 0.8, subjectivity > 0.6,
+                      subjectivity > 0.4, subjectivity > 0.2],
+                     ['highly subjective', 'subjective', 'neutral',
+                      'objective'], default='higly objective')
+
+
+def sentiment_labels(polarity, subjectivity):
+    """Return "<polarity category> <subjectivity category>" per row."""
+    return np.char.add(np.char.add(polarity_categories(polarity), ' '),
+                       subjectivity_categories(subjectivity)).astype(object)
+
+
+def add_sentiment_columns(df, text_column, prefix, **kwargs):
+    """
+    Score df[text_column] and add the dashboard columns
+    {prefix}_polarity_value, {prefix}_subjectivity_value and
+    sentiment_{prefix}.
+
+    Parameters:
+        df (pd.DataFrame): Articles.
+        text_column (str): Column to score, e.g. "title".
+        prefix (str): Column prefix, e.g. "title" or "article".
+        **kwargs: Passed to sentiment_scores.
+
+    Returns:
+        pd.DataFrame: df with the three columns added.
+    """
+    scores = sentiment_scores(df[text_column], **kwargs)
+    df[f"{prefix}_polarity_value"] = scores["polarity"]
+    df[f"{prefix}_subjectivity_value"] = scores["subjectivity"]
+    df[f"sentiment_{prefix}"] = sentiment_labels(scores["polarity"],
+                                                 scores["subjectivity"])
+    return df
+
+
+# Path: sl_utils/sentiment.py
+# end of file
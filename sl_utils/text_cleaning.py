@@ -0,0 +1,144 @@
+"""
+Description: Batch text cleaning for the corpus pipeline.
+
+    utils.clean_text rebuilt the stopword set and a WordNetLemmatizer on
+    every call and lemmatized every token from scratch. Here the
+    stopwords are one module-level frozenset, the HTML-tag and
+    punctuation patterns are compiled once into a single pass, and every
+    distinct token is lemmatized only once per process. Whole Series or
+    streams of chunks are cleaned on a process pool. The output is the
+    same as clean_text's: non-strings become "", tags and punctuation
+    are removed, and the lower-cased tokens are stopword-filtered and
+    lemmatized.
+
+    The NLTK resources are loaded on first use, so importing this module
+    does not need the NLTK data (utils downloads it).
+
+    Functions:
+    - clean_text: Cleans one text.
+    - clean_texts: Cleans a list of texts in this process.
+    - clean_series: Cleans a Series, chunks spread over processes.
+    - clean_chunks: Cleans a stream of chunks, yielding cleaned chunks.
+"""
+
+import collections
+import functools
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import pandas as pd
+from config import TEXT_CLEANING
+from sl_utils.logger import datapipeline_logger as logger, log_function_call
+
+# HTML tags, then any other character that is not a word character or
+# whitespace; one alternation removes both in a single pass with the
+# same result as the two substitutions applied in turn
+STRIP_PATTERN = re.compile(r'<.*?>|[^\w\s]')
+
+STOP_WORDS = None
+_lemmatize = None
+
+
+def _load_resources():
+    global STOP_WORDS, _lemmatize
+    if STOP_WORDS is None:
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+
+        # token -> lemma, filled as tokens are first seen
+        _lemmatize = functools.lru_cache(maxsize=None)(
+            WordNetLemmatizer().lemmatize)
+        STOP_WORDS = frozenset(stopwords.words('english'))
+
+
+def clean_text(text):
+    """Cleans the input text (see utils.clean_text)."""
+    if not isinstance(text, str):
+        return ""
+    _load_resources()
+    return ' '.join(_lemmatize(word) for word
+                    in STRIP_PATTERN.sub('', text).lower().split()
+                    if word not in STOP_WORDS)
+
+
+def clean_texts(texts):
+    """Return the cleaned text of each of texts, in this process."""
+    return [clean_text(text) for text in texts]
+
+
+def _chunks(values, chunk_size):
+    values = iter(values)
+    while chunk := list(islice(values, chunk_size)):
+        yield chunk
+
+
+def _map_chunks(chunks, n_process):
+    """
+    Yield (chunk, cleaned texts) in input order. At most two chunks per
+    worker are in flight, so a stream is never read far ahead.
+    """
+    if n_process <= 1:
+        for chunk in chunks:
+            yield chunk, clean_texts(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=n_process) as pool:
+        in_flight = collections.deque()
+        for chunk in chunks:
+            in_flight.append((chunk, pool.submit(clean_texts, list(chunk))))
+            if len(in_flight) >= 2 * n_process:
+                chunk, future = in_flight.popleft()
+                yield chunk, future.result()
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            yield chunk, future.result()
+
+
+@log_function_call(logger)
+def clean_series(texts, n_process=None, chunk_size=None):
+    """
+    Clean a Series of texts.
+
+    Parameters:
+        texts (pd.Series): Texts; non-strings become "".
+        n_process (int, optional): Worker processes. Defaults to
+            TEXT_CLEANING["n_process"]; one process runs in-process.
+        chunk_size (int, optional): Texts per worker task. Defaults to
+            TEXT_CLEANING["chunk_size"].
+
+    Returns:
+        pd.Series: Cleaned texts with the index and name of texts.
+    """
+    n_process = n_process or TEXT_CLEANING["n_process"]
+    chunk_size = chunk_size or TEXT_CLEANING["chunk_size"]
+    if len(texts) <= chunk_size:
+        n_process = 1
+    cleaned = [text for _, chunk in _map_chunks(_chunks(texts, chunk_size),
+                                                n_process)
+               for text in chunk]
+    logger.info(f"Cleaned {len(cleaned):,} texts")
+    return pd.Series(cleaned, index=texts.index, name=texts.name,
+                     dtype=object)
+
+
+def clean_chunks(chunks, n_process=None):
+    """
+    Clean a stream of chunks, e.g. pd.read_csv(..., chunksize=n)[column].
+
+    Parameters:
+        chunks (iterable): Series (or lists) of texts.
+        n_process (int, optional): Worker processes, as in clean_series.
+
+    Yields:
+        pd.Series or list: Each chunk cleaned, in input order; Series
+        keep their index and name.
+    """
+    n_process = n_process or TEXT_CLEANING["n_process"]
+    for chunk, cleaned in _map_chunks(chunks, n_process):
+        if isinstance(chunk, pd.Series):
+            cleaned = pd.Series(cleaned, index=chunk.index, name=chunk.name,
+                                dtype=object)
+        yield cleaned
+
+
+# Path: sl_utils/text_cleaning.py
+# end of file
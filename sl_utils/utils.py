@@ -8,13 +8,17 @@ import ast
 import pandas as pd
 import time
 import tqdm
+# cached, rate-limited geocoding (API key from GOOGLE_API_KEY)
+from sl_utils.geocoding import get_geolocation_info  # noqa: F401
+from sl_utils import location_extraction
+from sl_utils import text_cleaning
+from sl_utils import sentiment
+from sl_utils.media_classifier import MEDIA_KEYWORDS
 # from geopy.exc import GeocoderTimedOut
 # from geopy.geocoders import GoogleV3
 from google.cloud import api_keys_v2
 # from google.cloud.api_keys_v2 import Key
 import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 # from textblob import TextBlob
 # import spacy
 
@@ -25,18 +29,8 @@ tqdm.pandas
 nltk.download('stopwords')
 nltk.download('wordnet')
 
-# Load the spaCy model
-nlp = spacy.load("en_core_web_sm")
-
-# Initialize the geolocator
-# Load the API key from an environment variable
-api_key = os.getenv("GOOGLE_API_KEY")
-
-if not api_key:
-    raise RuntimeError("Google API key not found. Please set "
-                       "the GOOGLE_API_KEY environment variable.")
-
-geolocator = GoogleV3(api_key=api_key)
+# Load the spaCy model (NER only, the pipeline only uses GPE entities)
+nlp = location_extraction.get_ner_model()
 
 
 @log_function_call(logger)
@@ -100,41 +94,27 @@ def separate_string(input_string):
 
 @log_function_call(logger)
 def clean_text(text):
-    """Cleans the input text."""
-    # check that passed text is a string
-    if not isinstance(text, str):
-        return ""  # Return empty string for non-string input
-    # Remove HTML tags (if any)
-    text = re.sub(r'<.*?>', '', text)
-    # Remove special characters and punctuation
-    text = re.sub(r'[^\w\s]', '', text)
-    # Convert to lowercase
-    text = text.lower()
-    # Tokenization and stop word removal
-    words = text.split()
-    stop_words = set(stopwords.words('english'))
-    words = [word for word in words if word not in stop_words]
-    # Lemmatization
-    lemmatizer = WordNetLemmatizer()
-    words = [lemmatizer.lemmatize(word) for word in words]
-    # Rejoin the cleaned words
-    cleaned_text = ' '.join(words)
-    # return the cleaned text
-    return cleaned_text
-
-
-# Sentiment analysis on the cleaned text:
+    """Cleans the input text.
+
+    For whole columns use text_cleaning.clean_series, which shares the
+    stopwords and lemma cache and runs on several processes.
+    """
+    return text_cleaning.clean_text(text)
+
+
+# Sentiment analysis on the cleaned text (for whole columns use
+# sentiment.add_sentiment_columns, which caches and batches the scoring
+# and can use the lexicon scorer):
 def get_sentiment(text):
     # check that passed text is a string
     if isinstance(text, str):
-        # turn into a TextBlob object
-        blob = TextBlob(text)
-        return blob.sentiment.polarity, blob.sentiment.subjectivity
+        return sentiment.score_texts([text], "textblob")[0]
     else:
         return None, None
 
 
 # Functions to categorize the polarity and subjectivity scores
+# (sentiment.polarity_categories / subjectivity_categories for arrays)
 def categorize_polarity(polarity):
     if polarity > 0:
         return 'positive'
@@ -159,7 +139,9 @@ def categorize_subjectivity(subjectivity):
 
 # covert a string to a list
 def string_to_list(location_str):
-    """Safely converts a string representation of a list to a list."""
+    """Safely converts a string representation of a list to a list.
+    For whole columns use list_columns.parse_list_column, or store the
+    lists natively with list_columns.write_list_table."""
     try:
         return ast.literal_eval(location_str)
     except (ValueError, SyntaxError, TypeError):
@@ -220,71 +202,20 @@ def restrict_api_key_server(project_id: str, key_id: str) -> Key:
 
 # define media types
 def classify_media(text):
-    media_dict = {'video': ['video', 'watch', 'live',
-                            'stream', 'youtube',
-                            'vimeo', 'twitch'],
-                  'audio': ['audio', 'listen', 'podcast', 'radio'],
-                  'image': ['image', 'photo', 'picture', 'gif'],
-                  'infographic': ['infographic'],
-                  'poll': ['poll'],
-                  'twitter': ['twitter', 'X', 'x', 'tweet', 'retweeted'],
-                  'facebook': ['facebook', 'fb', 'like', 'share', 'comment'],
-                  'instagram': ['instagram', 'ig', ],
-                  'linkedin': ['linkedin', 'share'],
-                  }
+    """Media type of one text (for whole columns use
+    media_classifier.classify_media_series)."""
     # Handle NaN cases safely
     if pd.isna(text):
         return 'text'
-    for key, value in media_dict.items():
-        # Lowercase to ensure case insensitivity
-        if any(word in text.lower() for word in value):
+    # Lowercase to ensure case insensitivity
+    text = text.lower()
+    for key, value in MEDIA_KEYWORDS.items():
+        if any(word in text for word in value):
             return key
     # Default to 'text' if no media type is found
     return 'text'
 
 
-# Function to get geolocation information
-@log_function_call(logger)
-def get_geolocation_info(location):
-    usetimedelay = True
-    try:
-        location_info = geolocator.geocode(location, timeout=10)
-        if location_info:
-            if usetimedelay:
-                time.sleep(1)
-            return {
-                'latitude': location_info.latitude,
-                'longitude': location_info.longitude,
-                'address': location_info.address
-            }
-        else:
-            if usetimedelay:
-                time.sleep(1)
-            return {
-                'latitude': None,
-                'longitude': None,
-                'address': None
-            }
-    except GeocoderTimedOut:
-        print(location)
-        if usetimedelay:
-            time.sleep(1)
-        return {
-            'latitude': None,
-            'longitude': None,
-            'address': None
-        }
-    except Exception as e:
-        print(f"Geocoding error: {e}")
-        if usetimedelay:
-            time.sleep(1)
-        return {
-            'latitude': None,
-            'longitude': None,
-            'address': None
-        }
-
-
 # Function to extract geolocation details
 @log_function_call(logger)
 def extract_geolocation_details(address):
@@ -300,26 +231,10 @@ def extract_geolocation_details(address):
 
 @log_function_call(logger)
 def extract_locations(text, keyword_processor, nlp):
-    """Extracts location names from text using NLP and predefined list."""
-    logger.debug("Starting location extraction...")
-    # convert text to string
-    text = str(text)
-    # Use NLP to extract geographic locations (GPE entities)
-    doc = nlp(text)
-    nlp_locations = (
-        {ent.text.lower() for ent in doc.ents if ent.label_ == "GPE"})
-    logger.debug(f"NLP Extracted Locations: {nlp_locations}")
-
-    # Fast keyword matching for known locations
-    matched_locations = (
-        set(keyword_processor.extract_keywords(text.lower())))
-    logger.debug("Matched Locations"
-                 f" from Predefined List: {matched_locations}")
-
-    # Return matched locations if found; otherwise,
-    # return NLP-extracted ones
-    final_locations = (
-        matched_locations if matched_locations else nlp_locations)
-    logger.debug(f"Final Extracted Locations: {final_locations}")
-
-    return list(final_locations)
+    """Extracts location names from text using NLP and predefined list.
+
+    For whole corpora use location_extraction.extract_locations_batch,
+    which batches spaCy and skips it for keyword-matched articles.
+    """
+    return location_extraction.extract_locations(text, keyword_processor,
+                                                 nlp)
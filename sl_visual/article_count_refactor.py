@@ -1,7 +1,7 @@
 # PATH: sl_visualisations/article_count_refactor.py
 from sl_utils.logger import log_function_call, streamlit_logger
 from sl_utils.common_visual_functions import (
-    get_dataset_or_error,
+    get_rollup_or_error,
     select_display_type,
     prepare_counts,
     plot_bar,
@@ -11,9 +11,7 @@ from sl_utils.common_visual_functions import (
 @log_function_call(streamlit_logger)
 def plot_article_count_by_subject(target_label="Article Count by Subject",
                                   pageref_label="article_subject_count"):
-    df = get_dataset_or_error(["subject",
-                               "label",
-                               "article_count"])
+    df = get_rollup_or_error(["subject", "label"])
     if df is None:
         return
 
@@ -36,7 +34,7 @@ def plot_article_count_by_subject(target_label="Article Count by Subject",
 @log_function_call(streamlit_logger)
 def plot_article_count_by_source(target_label="Article Count by Source",
                                  pageref_label="article_source_count"):
-    df = get_dataset_or_error(["source_name", "label", "article_count"])
+    df = get_rollup_or_error(["source_name", "label"])
     if df is None:
         return
 
@@ -59,9 +57,7 @@ def plot_article_count_by_source(target_label="Article Count by Source",
 @log_function_call(streamlit_logger)
 def plot_article_count_by_media(target_label="Article Count by Media",
                                 pageref_label="article_media_count"):
-    df = get_dataset_or_error(["media_type",
-                               "label",
-                               "article_count"])
+    df = get_rollup_or_error(["media_type", "label"])
     if df is None:
         return
 
@@ -69,7 +65,7 @@ def plot_article_count_by_media(target_label="Article Count by Media",
     counts, y_value, y_label = prepare_counts(df,
                                               ["media_type", "label"],
                                               display_type)
-    sorted_order = counts.groupby("media_type")[y_value].sum().sort_values(ascending=False).index
+    sorted_order = counts.groupby("media_type", observed=True)[y_value].sum().sort_values(ascending=False).index
 
     plot_bar(
         data=counts,
@@ -86,9 +82,7 @@ def plot_article_count_by_media(target_label="Article Count by Media",
 @log_function_call(streamlit_logger)
 def plot_article_count_by_day_label(target_label="Article Count by Day Label",
                                     pageref_label="article_day_count"):
-    df = get_dataset_or_error(["day_label",
-                               "label",
-                               "article_count"])
+    df = get_rollup_or_error(["day_label", "label"])
     if df is None:
         return
 
@@ -112,16 +106,11 @@ def plot_article_count_by_day_label(target_label="Article Count by Day Label",
 @log_function_call(streamlit_logger)
 def plot_article_count_by_day(target_label="Article Count by Day",
                               pageref_label="article_day_count2"):
-    df = get_dataset_or_error(["year",
-                               "month",
-                               "article_count",
-                               "label"])
+    df = get_rollup_or_error(["date_clean", "label"])
     if df is None:
         return
 
-    # Convert year/month to proper datetime format
-    df["date_clean"] = pd.to_datetime(df["year"].astype(str) + "-" + df["month"].astype(str) + "-01")
-
+    # date_clean (year-month-01) is derived when the dataset is loaded
     # Optional filtering: only show years after 2015
     df = df[df["date_clean"].dt.year >= 2015]
 
@@ -144,9 +133,7 @@ def plot_article_count_by_day(target_label="Article Count by Day",
 @log_function_call(streamlit_logger)
 def plot_article_count_by_location(target_label="Article Count by Location",
                                    pageref_label="article_location_count"):
-    df = get_dataset_or_error(["unique_location_count",
-                               "label",
-                               "article_count"])
+    df = get_rollup_or_error(["unique_location_count", "label"])
     if df is None:
         return
 
@@ -1,33 +1,14 @@
 # PATH: sl_visualisations/boxplot_visuals.py
 
-import streamlit as st
 import matplotlib.pyplot as plt
-import pandas as pd
 from sl_utils.logger import log_function_call, streamlit_logger
 from sl_utils.common_visual_functions import (
     get_dataset_or_error,
     plot_violin
 )
-
-MAX_ROWS = 100000  # prevent memory overload for very large expansions
-
-
-def expand_weighted_df(df, columns, weight_col="article_count"):
-    """
-    Expand the DataFrame according to article_count values for accurate violin plots.
-    Clips total size to MAX_ROWS for memory safety.
-    """
-    df = df.copy()
-    df = df.loc[df[weight_col] > 0]
-    df = df.loc[:, columns + [weight_col]]
-
-    # Repeat each row based on its article_count
-    df_expanded = df.loc[df.index.repeat(df[weight_col])].drop(columns=weight_col)
-
-    if len(df_expanded) > MAX_ROWS:
-        df_expanded = df_expanded.sample(MAX_ROWS, random_state=42)
-
-    return df_expanded
+from sl_components.weighted_stats import get_label_distribution_stats
+from sl_data_for_dashboard.dataset_store import get_dataset_version
+from sl_utils.figure_cache import figure_key, show_figure
 
 
 @log_function_call(streamlit_logger)
@@ -37,7 +18,7 @@ def plot_polarity_subjectivity_boxplots(
 ):
     """
     Plots a grid of violin plots showing various polarity and subjectivity metrics
-    across real (1) and dubious (0) labels using weighted article_count expansion.
+    across real (1) and dubious (0) labels, weighted by article_count.
     """
 
     columns_required = [
@@ -55,18 +36,6 @@ def plot_polarity_subjectivity_boxplots(
 
     my_pal = {"0": "r", "1": "g", 0: "r", 1: "g"}
 
-    # Expand weighted rows for violin plotting
-    expanded_df = expand_weighted_df(df, [
-        "title_polarity", "title_subjectivity",
-        "article_polarity", "article_subjectivity",
-        "contradiction_subjectivity", "subjectivity_variations",
-        "contradiction_polarity", "polarity_variations",
-        "overall_subjectivity", "overall_polarity",
-        "text_length", "title_length", "label"
-    ])
-
-    fig, ax = plt.subplots(3, 4, figsize=(12, 6))
-
     plots = [
         ("title_polarity", "Title Polarity by Label",
          "Label", "Polarity", False),
@@ -94,16 +63,29 @@ def plot_polarity_subjectivity_boxplots(
          "Label", "Characters", True),
     ]
 
+    # The grid only depends on the dataset, so it is drawn once per version
+    key = figure_key("polarity_subjectivity_violins",
+                     get_dataset_version("data_clean"))
+    show_figure(key, lambda: _draw_violin_grid(plots, my_pal))
+
+
+def _draw_violin_grid(plots, color_map):
+    # Weighted densities and quantiles, computed once per dataset version
+    stats = get_label_distribution_stats(
+        [col for col, *_ in plots],
+        log_columns=[col for col, *_, log_scale in plots if log_scale])
+
+    fig, ax = plt.subplots(3, 4, figsize=(12, 6))
     for i, (col, title, xlabel, ylabel, log_scale) in enumerate(plots):
         row, col_index = divmod(i, 4)
         plot_violin(
-            ax[row, col_index], expanded_df, "label", col,
+            ax[row, col_index], stats[col],
             title=title, xlabel=xlabel, ylabel=ylabel,
-            log_scale=log_scale, color_map=my_pal
+            log_scale=log_scale, color_map=color_map
         )
 
-    plt.tight_layout()
-    st.pyplot(fig)
+    fig.tight_layout()
+    return fig
 
 # End of boxplot_visuals.py
 # Path: sl_visualisations/boxplot_visuals.py
\ No newline at end of file
@@ -6,8 +6,10 @@ from sl_utils.common_visual_functions import (
     apply_date_filter,
     plotly_weighted_scatter,
     plot_boxplot,
-    plot_hexbin_grid
+    plot_hexbin_grid,
+    date_filtered_cache_key
 )
+from sl_data_for_dashboard.dataset_store import get_dataset_version
 
 
 @log_function_call(streamlit_logger)
@@ -55,7 +57,8 @@ def plot_article_text_count_distribution(
         y_col="text_length",
         title="Article Text Count Distribution by Label",
         xlabel="Label",
-        ylabel="Text Count"
+        ylabel="Text Count",
+        cache_key=get_dataset_version("data_clean")
     )
 
 
@@ -81,7 +84,8 @@ def plot_hex_subjectivity():
         cmap="coolwarm",
         threshold=0.001,
         marginal_bins=30,
-        grid_size=30
+        grid_size=30,
+        cache_key=date_filtered_cache_key(filtered_df, "hex_subjectivity")
     )
 
 
@@ -115,5 +119,6 @@ def plot_hex_charcounts():
         xlim=(0, 25000),
         ylim=(0, 300),
         marginal_bins=25,
-        grid_size=50
+        grid_size=50,
+        cache_key=date_filtered_cache_key(filtered_df, "hex_charcounts")
     )